@@ -14,7 +14,8 @@ from .llm_client import (LLMProvider, LLMResponse, ResilientLLMClient,
 from .orchestrator import run_agent_analysis
 from .pulse_chat_agent import PulseChatAgent, create_pulse_chat_agent
 from .speech_to_text import get_stt_client, transcribe_audio, transcribe_base64
-from .text_to_speech import synthesize_speech, synthesize_speech_streaming
+from .text_to_speech import (synthesize_speech, synthesize_speech_streaming,
+                             synthesize_text_stream)
 
 __all__ = [
     "run_agent_analysis",
@@ -27,6 +28,7 @@ __all__ = [
     "get_stt_client",
     "synthesize_speech",
     "synthesize_speech_streaming",
+    "synthesize_text_stream",
     # Reliability exports
     "process_input",
     "Intent",
@@ -39,6 +39,7 @@ class VitalsState(TypedDict):
     # Calculated metrics
     hr_deviation_percent: Optional[float]
     hrv_deviation_percent: Optional[float]
+    quality_assessment: Optional[str]  # Gemini's note on measurement reliability
     
     # Risk assessment
     risk_score: int  # 0-100
@@ -75,6 +76,7 @@ def create_initial_state(
         vitals_history=None,
         hr_deviation_percent=None,
         hrv_deviation_percent=None,
+        quality_assessment=None,
         risk_score=0,
         risk_level="LOW",
         alerts=[],
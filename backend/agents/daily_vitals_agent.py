@@ -50,7 +50,9 @@ def validate_vitals_node(state: VitalsState) -> Dict[str, Any]:
     
     # Step 3: Retrieve vitals history
     try:
-        history = get_recent_vitals(patient_id, days=7)
+        history = get_recent_vitals(
+            patient_id, days=7, fields=("timestamp", "heart_rate", "hrv")
+        )
         reasoning_steps.append(f"✓ Retrieved {len(history)} vitals from last 7 days")
     except Exception as e:
         errors.append(f"Database error retrieving history: {str(e)}")
@@ -104,6 +106,7 @@ Be concise and clinical."""
         "vitals_history": history,
         "hr_deviation_percent": hr_deviation,
         "hrv_deviation_percent": hrv_deviation,
+        "quality_assessment": gemini_summary,
         "agent_reasoning": reasoning_steps,
         "alerts": alerts,
         "errors": errors
@@ -45,7 +45,7 @@ def print_result(result: dict, scenario_name: str):
     hr_pct = deviations.get("heart_rate_percent") or 0
     hrv_pct = deviations.get("hrv_percent") or 0
     
-    print(f"\n🫀 Current Vitals:")
+    print("\n🫀 Current Vitals:")
     print(f"   Heart Rate: {vitals.get('heart_rate')} bpm {get_trend_arrow(hr_pct)} ({hr_pct:+.1f}% from baseline)")
     print(f"   HRV: {vitals.get('hrv')} ms {get_trend_arrow(hrv_pct)} ({hrv_pct:+.1f}% from baseline)")
     print(f"   Quality: {vitals.get('quality_score', 0):.0%}")
@@ -53,7 +53,7 @@ def print_result(result: dict, scenario_name: str):
     # Baseline
     baseline = result.get("baseline", {})
     if baseline:
-        print(f"\n📏 Baseline:")
+        print("\n📏 Baseline:")
         print(f"   HR: {baseline.get('heart_rate')} bpm | HRV: {baseline.get('hrv')} ms")
     
     # Risk assessment with color emoji
@@ -64,7 +64,7 @@ def print_result(result: dict, scenario_name: str):
     print(f"\n{risk_emoji} Risk Assessment: {risk_level} ({risk.get('score', 0)}/100)")
     
     # Clinical reasoning (should now be concise)
-    print(f"\n🩺 Clinical Reasoning:")
+    print("\n🩺 Clinical Reasoning:")
     clinical = risk.get("clinical_reasoning", "N/A")
     # Word wrap at 65 chars
     words = clinical.split()
@@ -83,12 +83,12 @@ def print_result(result: dict, scenario_name: str):
     # Recommended actions (top 3 only for demo)
     actions = risk.get("recommended_actions", [])[:3]
     if actions:
-        print(f"\n📋 Key Actions:")
+        print("\n📋 Key Actions:")
         for i, action in enumerate(actions, 1):
             print(f"   {i}. {action}")
     
     # Patient explanation (should now be concise)
-    print(f"\n💬 Patient Explanation:")
+    print("\n💬 Patient Explanation:")
     explanation = result.get("patient_explanation", "N/A")
     words = explanation.split()
     lines = []
@@ -13,8 +13,7 @@ import re
 from enum import Enum
 from typing import Any, Dict, Optional, Tuple
 
-from .fallback_responses import (HARDCODED_EMERGENCY_CONTACT,
-                                 OUT_OF_SCOPE_RESPONSE,
+from .fallback_responses import (OUT_OF_SCOPE_RESPONSE,
                                  PROMPT_INJECTION_RESPONSE)
 
 
@@ -208,8 +207,6 @@ def classify_intent(text: str) -> Intent:
     if not text:
         return Intent.UNKNOWN
     
-    text_lower = text.lower()
-    
     # Emergency takes highest priority
     if _contains_keywords(text, EMERGENCY_KEYWORDS):
         return Intent.EMERGENCY
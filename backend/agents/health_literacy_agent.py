@@ -24,16 +24,11 @@ def explain_to_patient_node(state: VitalsState) -> Dict[str, Any]:
     vitals = state["current_vitals"]
     baseline = state.get("patient_baseline", {})
     risk_level = state.get("risk_level", "LOW")
-    risk_score = state.get("risk_score", 0)
-    recommended_actions = state.get("recommended_actions", [])
     
     # Get deviation percentages for explanation
     hr_pct = state.get("hr_deviation_percent", 0) or 0
     hrv_pct = state.get("hrv_deviation_percent", 0) or 0
     
-    # Get first action for patient
-    next_step = recommended_actions[0] if recommended_actions else "Continue your regular monitoring"
-    
     # Generate patient explanation with Gemini - DIFFERENT prompts per risk level
     patient_explanation = None
     try:
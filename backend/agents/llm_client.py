@@ -17,7 +17,7 @@ import os
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
 
 import httpx
 from dotenv import load_dotenv
@@ -38,9 +38,7 @@ except ImportError:
     GEMINI_AVAILABLE = False
 
 from .fallback_responses import (HARDCODED_EMERGENCY_CONTACT,
-                                 HARDCODED_MAINTENANCE_MSG,
-                                 HARDCODED_NEUTRAL_FALLBACK, RiskLevel,
-                                 get_greeting_fallback,
+                                 HARDCODED_NEUTRAL_FALLBACK,
                                  get_vital_response_fallback)
 from .gatekeeper import is_distressed
 
@@ -348,11 +346,10 @@ class ResilientLLMClient:
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         
-        for msg in chat_history:
-            messages.append({
-                "role": msg.get("role", "user"),
-                "content": msg.get("content", "")
-            })
+        messages.extend(
+            {"role": msg.get("role", "user"), "content": msg.get("content", "")}
+            for msg in chat_history
+        )
         
         messages.append({"role": "user", "content": prompt})
         
@@ -0,0 +1,76 @@
+# agents/metrics.py
+"""
+Latency metrics for the voice pipeline.
+
+Records time-to-first-token and time-per-output-token for Gemini streams and
+time-to-first-byte for ElevenLabs audio, so regressions (a model rollover, a
+bloated prompt) show up before users notice. Every measurement is logged;
+when prometheus_client is installed it is also exported as a histogram.
+"""
+
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from prometheus_client import Histogram
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+_MS_BUCKETS = (25, 50, 100, 200, 300, 500, 750, 1000, 1500, 2500, 5000)
+
+if PROMETHEUS_AVAILABLE:
+    LLM_TTFT = Histogram(
+        "pulse_llm_ttft_ms",
+        "Time from request to first streamed Gemini chunk",
+        ["model"],
+        buckets=_MS_BUCKETS,
+    )
+    LLM_TPOT = Histogram(
+        "pulse_llm_tpot_ms",
+        "Mean time per output token after the first",
+        ["model"],
+        buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+    )
+    TTS_TTFB = Histogram(
+        "pulse_tts_ttfb_ms",
+        "Time from request to first ElevenLabs audio chunk",
+        ["voice_id"],
+        buckets=_MS_BUCKETS,
+    )
+
+
+def record_llm_timing(model: str, ttft_ms: float, tpot_ms: Optional[float] = None) -> None:
+    """
+    Record latency for one streamed LLM response.
+
+    Args:
+        model: Model name used as the metric label
+        ttft_ms: Milliseconds until the first chunk arrived
+        tpot_ms: Mean milliseconds per output token after the first, if known
+    """
+    if tpot_ms is None:
+        logger.info(f"LLM {model}: ttft_ms={ttft_ms:.1f}")
+    else:
+        logger.info(f"LLM {model}: ttft_ms={ttft_ms:.1f} tpot_ms={tpot_ms:.2f}")
+
+    if PROMETHEUS_AVAILABLE:
+        LLM_TTFT.labels(model=model).observe(ttft_ms)
+        if tpot_ms is not None:
+            LLM_TPOT.labels(model=model).observe(tpot_ms)
+
+
+def record_tts_ttfb(voice_id: str, ttfb_ms: float) -> None:
+    """
+    Record time-to-first-byte for one TTS request.
+
+    Args:
+        voice_id: ElevenLabs voice ID used as the metric label
+        ttfb_ms: Milliseconds until the first audio chunk arrived
+    """
+    logger.info(f"TTS {voice_id}: tts_ttfb_ms={ttfb_ms:.1f}")
+
+    if PROMETHEUS_AVAILABLE:
+        TTS_TTFB.labels(voice_id=voice_id).observe(ttfb_ms)
@@ -83,6 +83,7 @@ def run_agent_analysis(
                 "heart_rate_percent": final_state.get("hr_deviation_percent"),
                 "hrv_percent": final_state.get("hrv_deviation_percent")
             },
+            "quality_assessment": final_state.get("quality_assessment"),
             "risk_assessment": {
                 "score": final_state.get("risk_score", 0),
                 "level": final_state.get("risk_level", "UNKNOWN"),
@@ -107,6 +108,7 @@ def run_agent_analysis(
                 "recommended_actions": ["Contact healthcare provider for manual assessment"]
             },
             "patient_explanation": "We couldn't complete the analysis right now. Please try again or contact your care team.",
+            "quality_assessment": None,
             "agent_steps": [],
             "alerts": [f"Analysis error: {str(e)}"],
             "errors": [str(e)]
@@ -10,22 +10,28 @@ Now with full reliability architecture:
 """
 
 import asyncio
+import json
 import logging
 import os
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
 
 from .fallback_responses import (HARDCODED_NEUTRAL_FALLBACK,
-                                 ICEBREAKER_QUESTIONS, get_greeting_fallback,
-                                 get_icebreaker_question,
-                                 get_vital_response_fallback)
+                                 ICEBREAKER_QUESTIONS, get_icebreaker_question)
 # Reliability imports
 from .gatekeeper import GatekeeperResult, Intent, process_input
-from .llm_client import LLMProvider, ResilientLLMClient, get_llm_client
+from .llm_client import ResilientLLMClient, get_llm_client
+from .metrics import record_llm_timing
 
 load_dotenv()
 
@@ -37,6 +43,124 @@ client = None
 if GEMINI_API_KEY:
     client = genai.Client(api_key=GEMINI_API_KEY)
 
+REPLY_PROMPT_TEMPLATE = """User said: "{user_text}"
+
+Respond empathetically and briefly (2-3 sentences). If they mention any symptoms, feelings, or health-related information, acknowledge it caringly."""
+
+# Direct Gemini turns get the reply and the extracted context as JSON fields
+STRUCTURED_TURN_PROMPT_TEMPLATE = REPLY_PROMPT_TEMPLATE + """
+
+Put your response in "reply". In "context_tag", briefly note any health-relevant information from their message (symptoms, mood, physical state, concerns). If nothing health-relevant, use "general check-in"."""
+
+GREETING_PROMPT_TEMPLATE = """Generate a warm, brief greeting for {first_name} who is starting their health check-in. 
+The camera is calibrating their vitals. Ask them how they've been feeling today in a caring way.
+Keep it to 2 sentences max."""
+
+CONTEXT_PROMPT_TEMPLATE = """Patient said: "{user_text}"
+
+Briefly note any health-relevant information from this message (symptoms, mood, physical state, concerns). If nothing health-relevant, use "general check-in"."""
+
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Context tags and history summaries are produced off the reply path, so a
+# cheaper model will do
+BACKGROUND_MODEL = "gemini-2.0-flash-lite"
+
+# Once more than MAX_HISTORY_TURNS model turns have accumulated, older turns
+# are folded into a rolling summary; the last two user/model pairs stay verbatim
+MAX_HISTORY_TURNS = 6
+KEEP_RECENT_CONTENTS = 4
+
+SUMMARY_PROMPT = "Summarize our conversation so far in 3-4 sentences for your own reference. Keep any symptoms, feelings, or health concerns the patient mentioned."
+
+TURN_RESPONSE_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "reply": types.Schema(type=types.Type.STRING),
+        "context_tag": types.Schema(type=types.Type.STRING),
+    },
+    required=["reply", "context_tag"],
+)
+
+# Context extraction for async turns runs as its own small JSON call
+_CONTEXT_TAG_CONFIG = types.GenerateContentConfig(
+    temperature=0,
+    response_mime_type="application/json",
+    response_schema=types.Schema(
+        type=types.Type.OBJECT,
+        properties={"context_tag": types.Schema(type=types.Type.STRING)},
+        required=["context_tag"],
+    ),
+)
+
+async def warm_up_gemini() -> None:
+    """
+    Fire a one-token request so the first real turn doesn't pay for the TLS
+    handshake and model routing. Also records the server's event loop for
+    greeting refreshes requested from worker threads.
+    """
+    global _greeting_loop
+    _greeting_loop = asyncio.get_running_loop()
+    if not client:
+        return
+    await client.aio.models.generate_content(
+        model=GEMINI_MODEL,
+        contents=[types.Content(role="user", parts=[types.Part.from_text(text="ok")])],
+        config=types.GenerateContentConfig(max_output_tokens=1),
+    )
+
+
+# History timestamps are raw epoch nanoseconds; ISO strings are only built
+# when a session summary is serialized
+_now = time.time_ns
+
+
+def _iso(timestamp_ns: int) -> str:
+    """Format an epoch-nanosecond timestamp as an ISO 8601 UTC string."""
+    return datetime.fromtimestamp(timestamp_ns / 1e9, timezone.utc).isoformat()
+
+
+# Role tags recur on every turn; share one string object for each
+_USER = sys.intern("user")
+_MODEL = sys.intern("model")
+
+# Fixed turns reused on every prefill and history summary instead of
+# building fresh Content/Part objects each time
+_PREFILL_TURN = types.Content(role=_USER, parts=[types.Part.from_text(text="...")])
+_SUMMARY_REQUEST = types.Content(role=_USER, parts=[types.Part.from_text(text=SUMMARY_PROMPT)])
+_SUMMARY_ACK = types.Content(role=_MODEL, parts=[types.Part.from_text(text="Understood.")])
+
+
+@dataclass(slots=True)
+class ConvMsg:
+    """A single conversation turn. Optional per-turn metadata lives in `meta`."""
+    role: str
+    content: str
+    timestamp: int
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Flatten into the wire format used by session summaries."""
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": _iso(self.timestamp),
+            **self.meta,
+        }
+
+
+@dataclass(slots=True)
+class SubjectiveRecord:
+    """Subjective health context extracted from one user turn."""
+    user_input: str
+    context_tag: str
+    timestamp: int
+    intent: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for session summaries."""
+        return {**asdict(self), "timestamp": _iso(self.timestamp)}
+
 
 class PulseChatAgent:
     """
@@ -91,8 +215,9 @@ Remember: You're gathering valuable health context while providing emotional sup
             patient_context: Optional context about the patient (name, conditions, history)
         """
         self.patient_context = patient_context or {}
-        self.conversation_history: List[Dict[str, str]] = []
-        self.subjective_data: List[Dict[str, Any]] = []
+        self.conversation_history: List[ConvMsg] = []
+        self._user_message_count = 0
+        self.subjective_data: List[SubjectiveRecord] = []
         self.model = None
         self.chat = None
         
@@ -102,6 +227,17 @@ Remember: You're gathering valuable health context while providing emotional sup
         # Icebreaker tracking for calibration phase
         self.icebreaker_index = 0
         self.is_calibrating = True
+
+        # Background prefill request issued while audio is being transcribed
+        self._prefill_task: Optional[asyncio.Task] = None
+
+        # Context extraction still running for async turns; writes to
+        # subjective_data from those tasks go through the lock
+        self._pending: Set[asyncio.Task] = set()
+        self._subjective_lock = asyncio.Lock()
+
+        # Background summary of older chat_history turns
+        self._compact_task: Optional[asyncio.Task] = None
         
         self._initialize_model()
 
@@ -110,18 +246,47 @@ Remember: You're gathering valuable health context while providing emotional sup
         if not GEMINI_API_KEY or not client:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
 
-        # Store the system prompt
-        self.system_prompt = self._build_system_prompt()
+        # The system prompt is identical for every patient so its prefix is
+        # shared (and served from Gemini's implicit cache); patient details go
+        # in the opening turns
+        self.system_prompt = self.SYSTEM_PROMPT
+        self._context_messages = self._build_context_messages()
 
-        # Initialize chat history for the new API
-        self.chat_history = []
+        # Initialize chat history for the new API, seeded with the patient context
+        self.chat_history = [
+            types.Content(
+                role=_USER if m["role"] == "user" else _MODEL,
+                parts=[types.Part.from_text(text=m["content"])],
+            )
+            for m in self._context_messages
+        ]
 
-    def _build_system_prompt(self) -> str:
-        """Build the system prompt with patient context."""
-        prompt = self.SYSTEM_PROMPT
+    @staticmethod
+    def _log_cache_usage(response) -> None:
+        """Log how many prompt tokens were served from Gemini's implicit cache."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            logger.debug(
+                f"Gemini prompt tokens: {usage.prompt_token_count}, "
+                f"cached: {usage.cached_content_token_count or 0}"
+            )
+
+    @staticmethod
+    def _record_stream_timing(last_chunk, t0: int, t_first: int, t_last: int) -> None:
+        """Report TTFT and, when the token count is known, TPOT for a stream."""
+        usage = getattr(last_chunk, "usage_metadata", None)
+        tokens = getattr(usage, "candidates_token_count", None) or 0
+        tpot_ms = (t_last - t_first) / (tokens - 1) / 1e6 if tokens > 1 else None
+        record_llm_timing(GEMINI_MODEL, (t_first - t0) / 1e6, tpot_ms)
 
+    def _build_context_messages(self) -> List[Dict[str, str]]:
+        """
+        Build the opening user/model exchange that carries patient context.
+
+        Returns an empty list when there is no patient context.
+        """
         if self.patient_context:
-            context_parts = ["\n\nPATIENT CONTEXT:"]
+            context_parts = ["PATIENT CONTEXT:"]
             if self.patient_context.get("name"):
                 context_parts.append(f"- Patient name: {self.patient_context['name']}")
             if self.patient_context.get("age"):
@@ -136,71 +301,240 @@ Remember: You're gathering valuable health context while providing emotional sup
                     f"- Typical heart rate: {baseline.get('heart_rate', 'unknown')} bpm"
                 )
 
-            prompt += "\n".join(context_parts)
+            return [
+                {"role": "user", "content": "\n".join(context_parts)},
+                {"role": "assistant", "content": "Understood. I'll keep this patient context in mind."},
+            ]
 
-        return prompt
+        return []
+
+    def _generate(self, structured: bool = False):
+        """Run chat_history through Gemini (as JSON {reply, context_tag} if structured)."""
+        response = client.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=self.chat_history,
+            config=_TURN_CONFIG if structured else _GENERATE_CONFIG,
+        )
+        self._log_cache_usage(response)
+        return response
 
     def _send_message(self, message: str) -> str:
         """Send a message to Gemini and get a response using the new API."""
         # Add user message to history
         self.chat_history.append(
-            types.Content(role="user", parts=[types.Part.from_text(text=message)])
+            types.Content(role=_USER, parts=[types.Part.from_text(text=message)])
         )
 
-        # Generate response
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=self.chat_history,
-            config=types.GenerateContentConfig(
-                system_instruction=self.system_prompt, temperature=0.7
-            ),
-        )
-
-        response_text = response.text.strip()
+        response_text = self._generate().text.strip()
 
         # Add assistant response to history
         self.chat_history.append(
             types.Content(
-                role="model", parts=[types.Part.from_text(text=response_text)]
+                role=_MODEL, parts=[types.Part.from_text(text=response_text)]
             )
         )
 
         return response_text
 
-    def get_greeting(self) -> str:
-        """Get an initial greeting to start the conversation."""
+    def _send_structured(self, message: str) -> Tuple[str, str]:
+        """
+        Send a turn that asks for a JSON {reply, context_tag} response.
+
+        Only the reply is kept in chat_history, so later turns never see the
+        metadata. Falls back to treating the whole text as the reply if the
+        JSON doesn't parse.
+
+        Returns:
+            Tuple of (reply, context_tag)
+        """
+        self.chat_history.append(
+            types.Content(role=_USER, parts=[types.Part.from_text(text=message)])
+        )
+
+        response_text = self._generate(structured=True).text
+        try:
+            data = json.loads(response_text)
+            reply = data["reply"].strip()
+            context_tag = data["context_tag"].strip() or "general"
+        except (ValueError, KeyError, TypeError, AttributeError):
+            reply, context_tag = response_text.strip(), "general"
+
+        self.chat_history.append(
+            types.Content(role=_MODEL, parts=[types.Part.from_text(text=reply)])
+        )
+
+        return reply, context_tag
+
+    def start_prefill(self) -> None:
+        """
+        Kick off a one-token request on the current history in the background.
+
+        Called while speech-to-text is still running, so that by the time the
+        transcript arrives Gemini has already processed the shared prefix and
+        only the new user tokens need prefilling.
+        """
+        if self._prefill_task is not None and not self._prefill_task.done():
+            return
+        self._prefill_task = asyncio.create_task(self._prefill())
+
+    async def _prefill(self) -> None:
+        """Send the current history with a throwaway turn, ignoring the result."""
+        try:
+            await client.aio.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=self.chat_history + [_PREFILL_TURN],
+                config=_PREFILL_CONFIG,
+            )
+        except Exception as e:
+            logger.debug(f"Gemini prefill failed: {e}")
+
+    async def _send_message_stream(self, message: str) -> AsyncIterator[str]:
+        """
+        Streaming variant of _send_message.
+
+        Yields text chunks as Gemini produces them, so callers see the first
+        token after prefill instead of after the full decode. The model turn is
+        only added to chat_history once the stream has finished.
+        """
+        self.chat_history.append(
+            types.Content(role=_USER, parts=[types.Part.from_text(text=message)])
+        )
+
+        parts: List[str] = []
+        last_chunk = None
+        t0 = time.perf_counter_ns()
+        t_first = t_last = None
+        async for chunk in await client.aio.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=self.chat_history,
+            config=_GENERATE_CONFIG,
+        ):
+            last_chunk = chunk
+            if chunk.text:
+                t_last = time.perf_counter_ns()
+                if t_first is None:
+                    t_first = t_last
+                parts.append(chunk.text)
+                yield chunk.text
+        self._log_cache_usage(last_chunk)
+        if t_first is not None:
+            self._record_stream_timing(last_chunk, t0, t_first, t_last)
+
+        self.chat_history.append(
+            types.Content(
+                role=_MODEL, parts=[types.Part.from_text(text="".join(parts).strip())]
+            )
+        )
+        self._maybe_compact_history()
+
+    def _maybe_compact_history(self) -> None:
+        """
+        Start summarizing older turns once the history passes MAX_HISTORY_TURNS.
+
+        Keeps per-turn prefill bounded regardless of session length. The
+        patient context prefix is never summarized.
+        """
+        if self._compact_task is not None and not self._compact_task.done():
+            return
+
+        start = len(self._context_messages)
+        turns = sum(1 for c in self.chat_history[start:] if c.role == _MODEL)
+        if turns > MAX_HISTORY_TURNS:
+            end = len(self.chat_history) - KEEP_RECENT_CONTENTS
+            self._compact_task = asyncio.create_task(self._compact_history(start, end))
+
+    async def _compact_history(self, start: int, end: int) -> None:
+        """Replace chat_history[start:end] with a summary exchange."""
+        try:
+            response = await client.aio.models.generate_content(
+                model=BACKGROUND_MODEL,
+                contents=self.chat_history[start:end] + [_SUMMARY_REQUEST],
+            )
+            summary = response.text.strip()
+        except Exception as e:
+            logger.debug(f"Chat history summary failed: {e}")
+            return
+
+        # Only appends happen while the summary is generated, so the slice
+        # still covers the same turns
+        self.chat_history[start:end] = [
+            types.Content(
+                role=_USER,
+                parts=[types.Part.from_text(text=f"Prior conversation summary: {summary}")],
+            ),
+            _SUMMARY_ACK,
+        ]
+
+    def _greeting_prompt(self) -> Tuple[str, str]:
+        """Return (first_name, prompt) for the opening greeting."""
         patient_name = self.patient_context.get("name", "there")
         first_name = patient_name.split()[0] if patient_name != "there" else "there"
 
-        greeting_prompt = f"""Generate a warm, brief greeting for {first_name} who is starting their health check-in. 
-The camera is calibrating their vitals. Ask them how they've been feeling today in a caring way.
-Keep it to 2 sentences max."""
+        return first_name, GREETING_PROMPT_TEMPLATE.format(first_name=first_name)
+
+    @staticmethod
+    def _greeting_fallback(first_name: str) -> str:
+        """Greeting used when the API fails."""
+        return f"Hi {first_name}! I'm checking your vitals now. While I calibrate, how have you been feeling since this morning?"
+
+    def _use_cached_greeting(self, greeting_prompt: str, greeting: str) -> None:
+        """Record a cached greeting as if it had just been generated."""
+        self.chat_history += [
+            types.Content(role=_USER, parts=[types.Part.from_text(text=greeting_prompt)]),
+            types.Content(role=_MODEL, parts=[types.Part.from_text(text=greeting)]),
+        ]
+        self.conversation_history.append(ConvMsg("assistant", greeting, _now()))
+
+    def get_greeting(self) -> str:
+        """Get an initial greeting to start the conversation."""
+        first_name, greeting_prompt = self._greeting_prompt()
+
+        greeting = _cached_greeting(first_name)
+        if greeting:
+            self._use_cached_greeting(greeting_prompt, greeting)
+            return greeting
 
         try:
             greeting = self._send_message(greeting_prompt)
 
             # Store in history
             self.conversation_history.append(
-                {
-                    "role": "assistant",
-                    "content": greeting,
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
+                ConvMsg("assistant", greeting, _now())
             )
 
             return greeting
-        except Exception as e:
+        except Exception:
             # Fallback greeting if API fails
-            fallback = f"Hi {first_name}! I'm checking your vitals now. While I calibrate, how have you been feeling since this morning?"
+            fallback = self._greeting_fallback(first_name)
             self.conversation_history.append(
-                {
-                    "role": "assistant",
-                    "content": fallback,
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
+                ConvMsg("assistant", fallback, _now())
             )
             return fallback
 
+    async def stream_greeting(self) -> AsyncIterator[str]:
+        """Streaming variant of get_greeting: yields the greeting as it is generated."""
+        first_name, greeting_prompt = self._greeting_prompt()
+
+        greeting = _cached_greeting(first_name)
+        if greeting:
+            self._use_cached_greeting(greeting_prompt, greeting)
+            yield greeting
+            return
+
+        parts: List[str] = []
+        try:
+            async for chunk in self._send_message_stream(greeting_prompt):
+                parts.append(chunk)
+                yield chunk
+        except Exception:
+            if not parts:
+                parts.append(self._greeting_fallback(first_name))
+                yield parts[0]
+
+        self.conversation_history.append(
+            ConvMsg("assistant", "".join(parts).strip(), _now())
+        )
+
     def get_icebreaker(self) -> str:
         """
         Get an icebreaker question during calibration phase.
@@ -209,12 +543,10 @@ Keep it to 2 sentences max."""
         question = get_icebreaker_question(self.icebreaker_index)
         self.icebreaker_index = (self.icebreaker_index + 1) % len(ICEBREAKER_QUESTIONS)
         
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": question,
-            "timestamp": datetime.utcnow().isoformat(),
-            "type": "icebreaker"
-        })
+        self.conversation_history.append(
+            ConvMsg("assistant", question, _now(),
+                    {"type": "icebreaker"})
+        )
         
         return question
 
@@ -222,6 +554,28 @@ Keep it to 2 sentences max."""
         """Mark calibration as complete."""
         self.is_calibrating = False
 
+    def _append_user_message(self, content: str, meta: Optional[Dict[str, Any]] = None) -> None:
+        """Record a user turn, keeping the running count used by session summaries."""
+        self.conversation_history.append(ConvMsg("user", content, _now(), meta or {}))
+        self._user_message_count += 1
+
+    def _record_turn(
+        self,
+        user_text: str,
+        ai_response: str,
+        context_tag: str,
+        intent: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Record the assistant reply and the subjective data point for a turn."""
+        timestamp = _now()
+        self.conversation_history.append(
+            ConvMsg("assistant", ai_response, timestamp, meta or {})
+        )
+        self.subjective_data.append(
+            SubjectiveRecord(user_text, context_tag, timestamp, intent)
+        )
+
     async def process_message_resilient(self, user_message: str) -> Dict[str, Any]:
         """
         Process a user message with full reliability pipeline.
@@ -238,28 +592,27 @@ Keep it to 2 sentences max."""
             Dict containing response and metadata
         """
         # Step 1: Gatekeeper
+        # Called inline on purpose: process_input is pure regex/keyword work
+        # (~10-25us median, ~250us at the 1000-char cap), well under the
+        # ~500us at which an asyncio.to_thread hop would start to pay off.
         gatekeeper_result: GatekeeperResult = process_input(user_message)
         
         # Store user message (sanitized)
-        self.conversation_history.append({
-            "role": "user",
-            "content": gatekeeper_result.sanitized_text,
-            "timestamp": datetime.utcnow().isoformat(),
-            "intent": gatekeeper_result.intent.value,
-            "flags": gatekeeper_result.flags
-        })
+        self._append_user_message(
+            gatekeeper_result.sanitized_text,
+            {"intent": gatekeeper_result.intent.value,
+             "flags": gatekeeper_result.flags},
+        )
         
         # Step 2: Check if we should bypass LLM
         if gatekeeper_result.should_bypass_llm:
             bypass_msg = gatekeeper_result.bypass_response.get("message", HARDCODED_NEUTRAL_FALLBACK["message"])
             
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": bypass_msg,
-                "timestamp": datetime.utcnow().isoformat(),
-                "type": "bypass",
-                "reason": "blocked" if not gatekeeper_result.is_safe else "out_of_scope"
-            })
+            self.conversation_history.append(
+                ConvMsg("assistant", bypass_msg, _now(),
+                        {"type": "bypass",
+                         "reason": "blocked" if not gatekeeper_result.is_safe else "out_of_scope"})
+            )
             
             return {
                 "response": bypass_msg,
@@ -269,49 +622,26 @@ Keep it to 2 sentences max."""
                 "is_safe": gatekeeper_result.is_safe
             }
         
-        # Step 3: Build context-aware prompt
-        context_prompt = f"""User said: "{gatekeeper_result.sanitized_text}"
-
-Respond empathetically and briefly (2-3 sentences). If they mention any symptoms, feelings, or health-related information, acknowledge it caringly.
-
-After your response, on a new line starting with "CONTEXT:", briefly note any health-relevant information from their message (symptoms, mood, physical state, concerns). If nothing health-relevant, write "CONTEXT: general check-in"."""
-        
-        # Step 4: Call resilient LLM
+        # Step 3: Call resilient LLM with a reply-only prompt; the context tag
+        # is extracted in the background so it doesn't delay the reply
         llm_response = await self.resilient_client.generate(
-            prompt=context_prompt,
+            prompt=REPLY_PROMPT_TEMPLATE.format(user_text=gatekeeper_result.sanitized_text),
             system_prompt=self.system_prompt,
-            chat_history=[{"role": h["role"], "content": h["content"]} 
-                          for h in self.conversation_history[-10:]],  # Last 10 messages for context
+            chat_history=self._context_messages
+                         + [{"role": h.role, "content": h.content}
+                            for h in self.conversation_history[-10:]],  # Last 10 messages for context
             context=self.patient_context
         )
         
-        full_response = llm_response.text
-        
-        # Parse response and context
-        if "CONTEXT:" in full_response:
-            parts = full_response.split("CONTEXT:")
-            ai_response = parts[0].strip()
-            context_tag = parts[1].strip() if len(parts) > 1 else "general"
-        else:
-            ai_response = full_response
-            context_tag = "general"
-        
-        # Store AI response
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": ai_response,
-            "timestamp": datetime.utcnow().isoformat(),
-            "provider": llm_response.provider.value,
-            "fallback_used": llm_response.fallback_used
-        })
-        
-        # Store subjective data
-        self.subjective_data.append({
-            "user_input": gatekeeper_result.sanitized_text,
-            "context_tag": context_tag,
-            "timestamp": datetime.utcnow().isoformat(),
-            "intent": gatekeeper_result.intent.value
-        })
+        ai_response = llm_response.text.strip()
+        self.conversation_history.append(
+            ConvMsg("assistant", ai_response, _now(),
+                    {"provider": llm_response.provider.value,
+                     "fallback_used": llm_response.fallback_used})
+        )
+        self._schedule_context_extraction(
+            gatekeeper_result.sanitized_text, intent=gatekeeper_result.intent.value
+        )
         
         # Flag emergency intent for clinical alert
         should_alert = gatekeeper_result.intent == Intent.EMERGENCY
@@ -320,7 +650,6 @@ After your response, on a new line starting with "CONTEXT:", briefly note any he
         
         return {
             "response": ai_response,
-            "context_extracted": context_tag,
             "success": True,
             "intent": gatekeeper_result.intent.value,
             "provider": llm_response.provider.value,
@@ -340,50 +669,13 @@ After your response, on a new line starting with "CONTEXT:", briefly note any he
             Dict containing response and extracted context
         """
         # Store user message
-        self.conversation_history.append(
-            {
-                "role": "user",
-                "content": user_message,
-                "timestamp": datetime.utcnow().isoformat(),
-            }
-        )
-
-        # Build context-aware prompt
-        context_prompt = f"""User said: "{user_message}"
-
-Respond empathetically and briefly (2-3 sentences). If they mention any symptoms, feelings, or health-related information, acknowledge it caringly.
-
-After your response, on a new line starting with "CONTEXT:", briefly note any health-relevant information from their message (symptoms, mood, physical state, concerns). If nothing health-relevant, write "CONTEXT: general check-in"."""
+        self._append_user_message(user_message)
 
         try:
-            full_response = self._send_message(context_prompt)
-
-            # Parse response and context
-            if "CONTEXT:" in full_response:
-                parts = full_response.split("CONTEXT:")
-                ai_response = parts[0].strip()
-                context_tag = parts[1].strip() if len(parts) > 1 else "general"
-            else:
-                ai_response = full_response
-                context_tag = "general"
-
-            # Store AI response
-            self.conversation_history.append(
-                {
-                    "role": "assistant",
-                    "content": ai_response,
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
-            )
-
-            # Store subjective data
-            self.subjective_data.append(
-                {
-                    "user_input": user_message,
-                    "context_tag": context_tag,
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
+            ai_response, context_tag = self._send_structured(
+                STRUCTURED_TURN_PROMPT_TEMPLATE.format(user_text=user_message)
             )
+            self._record_turn(user_message, ai_response, context_tag)
 
             return {
                 "response": ai_response,
@@ -394,11 +686,7 @@ After your response, on a new line starting with "CONTEXT:", briefly note any he
         except Exception as e:
             error_response = "I'm here with you. Tell me more about how you're feeling."
             self.conversation_history.append(
-                {
-                    "role": "assistant",
-                    "content": error_response,
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
+                ConvMsg("assistant", error_response, _now())
             )
 
             return {
@@ -408,15 +696,72 @@ After your response, on a new line starting with "CONTEXT:", briefly note any he
                 "error": str(e),
             }
 
-    def get_vital_response(self, heart_rate: float, hrv: float, is_normal: bool) -> str:
+    async def stream_message(self, user_message: str) -> AsyncIterator[str]:
         """
-        Generate a response after vitals are measured.
+        Streaming variant of process_message.
 
-        Args:
-            heart_rate: Measured heart rate
-            hrv: Measured HRV
-            is_normal: Whether vitals are within normal range
+        Only the reply is requested, so every streamed token is user-facing.
+        The context tag is extracted afterwards by a background call.
         """
+        self._append_user_message(user_message)
+
+        parts: List[str] = []
+        try:
+            async for chunk in self._send_message_stream(
+                REPLY_PROMPT_TEMPLATE.format(user_text=user_message)
+            ):
+                parts.append(chunk)
+                yield chunk
+        except Exception:
+            if not parts:
+                error_response = "I'm here with you. Tell me more about how you're feeling."
+                self.conversation_history.append(
+                    ConvMsg("assistant", error_response, _now())
+                )
+                yield error_response
+                return
+
+        self.conversation_history.append(
+            ConvMsg("assistant", "".join(parts).strip(), _now())
+        )
+
+        self._schedule_context_extraction(user_message)
+
+    def _schedule_context_extraction(self, user_text: str, intent: Optional[str] = None) -> None:
+        """Start tagging a turn's health context without blocking the reply."""
+        task = asyncio.create_task(
+            self._extract_context_async(user_text, _now(), intent)
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _extract_context_async(
+        self, user_text: str, timestamp: int, intent: Optional[str] = None
+    ) -> None:
+        """Tag a turn's health context and record it as subjective data."""
+        try:
+            response = await client.aio.models.generate_content(
+                model=BACKGROUND_MODEL,
+                contents=CONTEXT_PROMPT_TEMPLATE.format(user_text=user_text),
+                config=_CONTEXT_TAG_CONFIG,
+            )
+            context_tag = json.loads(response.text)["context_tag"].strip() or "general"
+        except Exception as e:
+            logger.debug(f"Context extraction failed: {e}")
+            context_tag = "general"
+
+        async with self._subjective_lock:
+            self.subjective_data.append(
+                SubjectiveRecord(user_text, context_tag, timestamp, intent)
+            )
+
+    async def wait_for_context(self) -> None:
+        """Wait for any in-flight context extraction to land in subjective_data."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def _vital_prompt(self, heart_rate: float, hrv: float, is_normal: bool) -> str:
+        """Build the prompt used to respond to a vitals measurement."""
         # Gather conversation context for better response
         mood_context = self._summarize_subjective_context()
 
@@ -436,29 +781,61 @@ Give a brief, reassuring response (2-3 sentences) acknowledging their good vital
 Their conversation context: {mood_context}
 
 Give a brief, calm response (2-3 sentences). Don't alarm them, but acknowledge the reading and ask if any of the common causes might apply (recent exercise, caffeine, stress). Be supportive and gentle."""
+        return prompt
+
+    @staticmethod
+    def _vital_fallback(heart_rate: float, is_normal: bool) -> str:
+        """Vital response used when the API fails."""
+        if is_normal:
+            return f"Good news! Your heart rate is {heart_rate} bpm, which looks healthy. Keep taking care of yourself!"
+        return f"I'm seeing your heart rate at {heart_rate} bpm. Have you been active recently, or had any caffeine? Let's take a moment to relax."
+
+    def get_vital_response(self, heart_rate: float, hrv: float, is_normal: bool) -> str:
+        """
+        Generate a response after vitals are measured.
+
+        Args:
+            heart_rate: Measured heart rate
+            hrv: Measured HRV
+            is_normal: Whether vitals are within normal range
+        """
+        prompt = self._vital_prompt(heart_rate, hrv, is_normal)
 
         try:
             vital_response = self._send_message(prompt)
 
-            # Clean up any CONTEXT: tags that might slip through
-            if "CONTEXT:" in vital_response:
-                vital_response = vital_response.split("CONTEXT:")[0].strip()
-
             self.conversation_history.append(
-                {
-                    "role": "assistant",
-                    "content": vital_response,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "type": "vital_response",
-                }
+                ConvMsg("assistant", vital_response, _now(),
+                        {"type": "vital_response"})
             )
 
             return vital_response
         except Exception:
-            if is_normal:
-                return f"Good news! Your heart rate is {heart_rate} bpm, which looks healthy. Keep taking care of yourself!"
-            else:
-                return f"I'm seeing your heart rate at {heart_rate} bpm. Have you been active recently, or had any caffeine? Let's take a moment to relax."
+            return self._vital_fallback(heart_rate, is_normal)
+
+    async def stream_vital_response(
+        self, heart_rate: float, hrv: float, is_normal: bool
+    ) -> AsyncIterator[str]:
+        """Streaming variant of get_vital_response."""
+        # The mood context is built from subjective_data, so let pending
+        # extractions finish first
+        await self.wait_for_context()
+        prompt = self._vital_prompt(heart_rate, hrv, is_normal)
+
+        parts: List[str] = []
+        try:
+            async for chunk in self._send_message_stream(prompt):
+                parts.append(chunk)
+                yield chunk
+        except Exception:
+            if not parts:
+                yield self._vital_fallback(heart_rate, is_normal)
+            return
+
+        self.conversation_history.append(
+            ConvMsg("assistant", "".join(parts).strip(), _now(),
+                    {"type": "vital_response"})
+        )
 
     def _summarize_subjective_context(self) -> str:
         """Summarize the subjective context collected during conversation."""
@@ -466,9 +843,9 @@ Give a brief, calm response (2-3 sentences). Don't alarm them, but acknowledge t
             return "No specific context shared"
 
         contexts = [
-            d["context_tag"]
+            d.context_tag
             for d in self.subjective_data
-            if d["context_tag"] != "general"
+            if d.context_tag != "general"
         ]
         if not contexts:
             return "General check-in, no specific symptoms mentioned"
@@ -478,16 +855,148 @@ Give a brief, calm response (2-3 sentences). Don't alarm them, but acknowledge t
     def get_session_summary(self) -> Dict[str, Any]:
         """Get a summary of the chat session for storage."""
         return {
-            "conversation_history": self.conversation_history,
-            "subjective_data": self.subjective_data,
+            "conversation_history": [m.to_dict() for m in self.conversation_history],
+            "subjective_data": [d.to_dict() for d in self.subjective_data],
             "subjective_summary": self._summarize_subjective_context(),
-            "message_count": len(
-                [m for m in self.conversation_history if m["role"] == "user"]
-            ),
-            "session_end": datetime.utcnow().isoformat(),
+            "message_count": self._user_message_count,
+            "session_end": datetime.now(timezone.utc),
         }
 
 
+# The system prompt is static, so its Content and the generate configs built
+# on it are created once and shared by every agent. It is too short for an
+# explicit context cache; Gemini's implicit prefix caching covers it.
+_SYSTEM_CONTENT = types.Content(
+    parts=[types.Part.from_text(text=PulseChatAgent.SYSTEM_PROMPT)]
+)
+_GENERATE_CONFIG = types.GenerateContentConfig(
+    system_instruction=_SYSTEM_CONTENT, temperature=0.7
+)
+# Structured (JSON) turn variant for _send_structured
+_TURN_CONFIG = _GENERATE_CONFIG.model_copy(
+    update={
+        "response_mime_type": "application/json",
+        "response_schema": TURN_RESPONSE_SCHEMA,
+    }
+)
+_PREFILL_CONFIG = _GENERATE_CONFIG.model_copy(update={"max_output_tokens": 1})
+
+
+# Pre-generated greetings per first name, served instantly to later sessions
+# and regenerated in the background once stale. Least recently used names are
+# evicted past GREETING_CACHE_SIZE.
+GREETING_CACHE_SIZE = 512
+GREETING_VARIANTS = 8
+GREETING_TTL_SECONDS = 3600
+_greeting_cache: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+# Name -> running refresh (None until its task starts on the loop)
+_greeting_refreshes: Dict[str, Optional[asyncio.Task]] = {}
+# get_greeting also runs in worker threads (asyncio.to_thread), so the cache
+# and refresh bookkeeping are shared across threads
+_greeting_lock = threading.Lock()
+# The server's event loop, which refreshes requested from worker threads run on
+_greeting_loop: Optional[asyncio.AbstractEventLoop] = None
+
+_GREETING_VARIANTS_CONFIG = types.GenerateContentConfig(
+    system_instruction=_SYSTEM_CONTENT,
+    temperature=1.0,
+    response_mime_type="application/json",
+    response_schema=types.Schema(
+        type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)
+    ),
+)
+
+
+def _cached_greeting(first_name: str) -> Optional[str]:
+    """
+    Pick a cached greeting for `first_name`.
+
+    Schedules a background refresh when the entry is missing or stale; a stale
+    entry is still served in the meantime. Returns None on a cache miss.
+    """
+    with _greeting_lock:
+        entry = _greeting_cache.get(first_name)
+        if entry is not None:
+            _greeting_cache.move_to_end(first_name)
+    if entry is None or time.monotonic() - entry[0] > GREETING_TTL_SECONDS:
+        _schedule_greeting_refresh(first_name)
+    if entry is None:
+        return None
+
+    return random.choice(entry[1])
+
+
+def _schedule_greeting_refresh(first_name: str) -> None:
+    """
+    Start regenerating greetings for `first_name` unless already running.
+
+    From a worker thread the refresh is handed to the server's event loop.
+    """
+    global _greeting_loop
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    loop = running or _greeting_loop
+    if loop is None or loop.is_closed():
+        # No loop seen yet; a later async session fills the entry
+        return
+
+    with _greeting_lock:
+        if first_name in _greeting_refreshes:
+            return
+        _greeting_refreshes[first_name] = None
+
+    if running is not None:
+        _greeting_loop = running
+        _start_greeting_refresh(first_name)
+        return
+    try:
+        loop.call_soon_threadsafe(_start_greeting_refresh, first_name)
+    except RuntimeError:
+        # Loop closed in the meantime (shutdown)
+        with _greeting_lock:
+            _greeting_refreshes.pop(first_name, None)
+
+
+def _start_greeting_refresh(first_name: str) -> None:
+    """Create the refresh task; runs on the event loop."""
+    task = asyncio.get_running_loop().create_task(_refresh_greetings(first_name))
+    with _greeting_lock:
+        _greeting_refreshes[first_name] = task
+    task.add_done_callback(lambda _: _forget_greeting_refresh(first_name))
+
+
+def _forget_greeting_refresh(first_name: str) -> None:
+    with _greeting_lock:
+        _greeting_refreshes.pop(first_name, None)
+
+
+async def _refresh_greetings(first_name: str) -> None:
+    """Generate GREETING_VARIANTS greetings for `first_name` in one call."""
+    prompt = (
+        GREETING_PROMPT_TEMPLATE.format(first_name=first_name)
+        + f"\n\nWrite {GREETING_VARIANTS} different versions as a JSON array of strings."
+    )
+    try:
+        response = await client.aio.models.generate_content(
+            model=GEMINI_MODEL, contents=prompt, config=_GREETING_VARIANTS_CONFIG
+        )
+        greetings = [
+            g.strip() for g in json.loads(response.text) if isinstance(g, str) and g.strip()
+        ]
+    except Exception as e:
+        logger.debug(f"Greeting refresh failed for {first_name}: {e}")
+        return
+
+    if greetings:
+        with _greeting_lock:
+            _greeting_cache[first_name] = (time.monotonic(), greetings)
+            _greeting_cache.move_to_end(first_name)
+            while len(_greeting_cache) > GREETING_CACHE_SIZE:
+                _greeting_cache.popitem(last=False)
+
+
 # Convenience function for creating agents
 def create_pulse_chat_agent(patient_id: str = None) -> PulseChatAgent:
     """
@@ -503,9 +1012,10 @@ def create_pulse_chat_agent(patient_id: str = None) -> PulseChatAgent:
 
     if patient_id:
         # Import here to avoid circular imports
-        from db_helpers import get_patient
+        from db_helpers import get_patient_profile
 
-        patient = get_patient(patient_id)
+        # Cached, so reconnects and REST calls skip the MongoDB round-trip
+        patient = get_patient_profile(patient_id)
         if patient:
             patient_context = {
                 "name": patient.get("name"),
@@ -515,4 +1025,3 @@ def create_pulse_chat_agent(patient_id: str = None) -> PulseChatAgent:
             }
 
     return PulseChatAgent(patient_context=patient_context)
-    return PulseChatAgent(patient_context=patient_context)
@@ -6,7 +6,6 @@ Provides fast, accurate transcription for voice-based health check-ins.
 
 import base64
 import os
-import tempfile
 from typing import Any, Dict, Optional
 
 import httpx
@@ -15,7 +14,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_API_URL = "https://api.groq.com/openai/v1/audio/transcriptions"
+GROQ_BASE_URL = "https://api.groq.com"
+GROQ_TRANSCRIPTIONS_PATH = "/openai/v1/audio/transcriptions"
 
 
 class GroqSpeechToText:
@@ -32,10 +32,23 @@ class GroqSpeechToText:
         self.api_key = GROQ_API_KEY
         self.model = "whisper-large-v3-turbo"  # Fast and accurate
 
+        # One pooled client for the process so the TLS/HTTP2 session to Groq
+        # is reused across utterances instead of re-handshaking each time
+        self._http = httpx.AsyncClient(
+            base_url=GROQ_BASE_URL,
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=2.0),
+            limits=httpx.Limits(max_keepalive_connections=10),
+        )
+
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        await self._http.aclose()
+
     async def transcribe_audio(
         self,
         audio_data: bytes,
-        audio_format: str = "webm",
+        audio_format: str = "wav",
         language: Optional[str] = "en",
     ) -> Dict[str, Any]:
         """
@@ -43,42 +56,31 @@ class GroqSpeechToText:
 
         Args:
             audio_data: Raw audio bytes
-            audio_format: Audio format (webm, wav, mp3, etc.)
+            audio_format: Audio format (wav, webm, mp3, etc.). Clients send
+                16 kHz mono PCM WAV, which Whisper takes without resampling.
             language: Optional language hint (default: English)
 
         Returns:
             Dict with transcription result
         """
         try:
-            # Create a temporary file with the audio data
-            suffix = f".{audio_format}"
-            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_path = temp_file.name
-
-            # Make the API request
-            async with httpx.AsyncClient() as client:
-                with open(temp_path, "rb") as audio_file:
-                    files = {
-                        "file": (f"audio{suffix}", audio_file, f"audio/{audio_format}")
-                    }
-                    data = {
-                        "model": self.model,
-                        "response_format": "json",
-                    }
-                    if language:
-                        data["language"] = language
-
-                    response = await client.post(
-                        GROQ_API_URL,
-                        headers={"Authorization": f"Bearer {self.api_key}"},
-                        files=files,
-                        data=data,
-                        timeout=30.0,
-                    )
-
-            # Clean up temp file
-            os.unlink(temp_path)
+            # Post the bytes straight from memory - no temp file round-trip
+            files = {
+                "file": (f"audio.{audio_format}", audio_data, f"audio/{audio_format}")
+            }
+            data = {
+                "model": self.model,
+                "response_format": "json",
+            }
+            if language:
+                data["language"] = language
+
+            response = await self._http.post(
+                GROQ_TRANSCRIPTIONS_PATH,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                files=files,
+                data=data,
+            )
 
             if response.status_code == 200:
                 result = response.json()
@@ -100,7 +102,7 @@ class GroqSpeechToText:
     async def transcribe_base64(
         self,
         audio_base64: str,
-        audio_format: str = "webm",
+        audio_format: str = "wav",
         language: Optional[str] = "en",
     ) -> Dict[str, Any]:
         """
@@ -138,8 +140,16 @@ def get_stt_client() -> GroqSpeechToText:
     return _stt_instance
 
 
+async def close_stt_client():
+    """Close the STT singleton's HTTP client, if one was created."""
+    global _stt_instance
+    if _stt_instance is not None:
+        await _stt_instance.aclose()
+        _stt_instance = None
+
+
 async def transcribe_audio(
-    audio_data: bytes, audio_format: str = "webm", language: str = "en"
+    audio_data: bytes, audio_format: str = "wav", language: str = "en"
 ) -> Dict[str, Any]:
     """
     Convenience function to transcribe audio.
@@ -157,7 +167,7 @@ async def transcribe_audio(
 
 
 async def transcribe_base64(
-    audio_base64: str, audio_format: str = "webm", language: str = "en"
+    audio_base64: str, audio_format: str = "wav", language: str = "en"
 ) -> Dict[str, Any]:
     """
     Convenience function to transcribe base64 audio.
@@ -172,4 +182,3 @@ async def transcribe_base64(
     """
     client = get_stt_client()
     return await client.transcribe_base64(audio_base64, audio_format, language)
-    return await client.transcribe_base64(audio_base64, audio_format, language)
@@ -5,18 +5,30 @@ Provides streaming audio synthesis for real-time conversational AI.
 
 import asyncio
 import base64
+import json
 import os
-from typing import AsyncGenerator, Optional
+import time
+from typing import AsyncGenerator, AsyncIterable, Optional
 
+import httpx
+import websockets
 from elevenlabs import ElevenLabs, VoiceSettings
 
+from .metrics import record_tts_ttfb
+
 # ElevenLabs client - initialized lazily
 _client: Optional[ElevenLabs] = None
+_http: Optional[httpx.Client] = None
 
 # Default voice settings for warm, compassionate nurse persona
 DEFAULT_VOICE_ID = "EXAVITQu4vr4xnSDxMaL"  # "Sarah" - warm female voice
 DEFAULT_MODEL = "eleven_turbo_v2_5"  # Fast, high-quality model for streaming
 
+# Low-bitrate MP3 is plenty for speech and reaches the client sooner;
+# latency level 3 trades a little text normalization for faster first audio
+OUTPUT_FORMAT = "mp3_22050_32"
+STREAMING_LATENCY = 3
+
 # Voice settings for consistent, empathetic tone
 VOICE_SETTINGS = VoiceSettings(
     stability=0.7,  # Higher stability for consistent medical communication
@@ -26,17 +38,40 @@ VOICE_SETTINGS = VoiceSettings(
 )
 
 
+# Streaming-input endpoint: accepts text incrementally, returns audio as it goes
+ELEVENLABS_STREAM_INPUT_URL = (
+    "wss://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream-input"
+    "?model_id={model_id}&output_format={output_format}"
+    "&optimize_streaming_latency={latency}"
+)
+
+
 def get_client() -> ElevenLabs:
     """Get or create the ElevenLabs client."""
-    global _client
+    global _client, _http
     if _client is None:
         api_key = os.getenv("ELEVENLABS_API_KEY")
         if not api_key:
             raise ValueError("ELEVENLABS_API_KEY environment variable not set")
-        _client = ElevenLabs(api_key=api_key)
+        # One pooled HTTP/2 client for the process: concurrent TTS streams from
+        # executor threads multiplex over kept-alive connections instead of
+        # each paying a TLS handshake
+        _http = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+        )
+        _client = ElevenLabs(api_key=api_key, httpx_client=_http)
     return _client
 
 
+def close_client() -> None:
+    """Close the pooled HTTP client, if one was created."""
+    global _client, _http
+    if _http is not None:
+        _http.close()
+    _client = _http = None
+
+
 async def synthesize_speech_streaming(
     text: str, voice_id: Optional[str] = None, model: Optional[str] = None
 ) -> AsyncGenerator[bytes, None]:
@@ -62,19 +97,112 @@ async def synthesize_speech_streaming(
             voice_id=voice,
             model_id=model_id,
             voice_settings=VOICE_SETTINGS,
-            output_format="mp3_44100_128",
+            output_format=OUTPUT_FORMAT,
+            optimize_streaming_latency=STREAMING_LATENCY,
         )
 
     # Get the generator from thread pool
+    t0 = time.perf_counter_ns()
     loop = asyncio.get_event_loop()
     audio_generator = await loop.run_in_executor(None, generate_audio)
 
     # Yield chunks from the generator
+    first = True
     for chunk in audio_generator:
         if chunk:
+            if first:
+                record_tts_ttfb(voice, (time.perf_counter_ns() - t0) / 1e6)
+                first = False
             yield chunk
 
 
+async def synthesize_text_stream(
+    text_iter: AsyncIterable[str],
+    voice_id: Optional[str] = None,
+    model: Optional[str] = None,
+) -> AsyncGenerator[bytes, None]:
+    """
+    Synthesize speech from streamed text over the ElevenLabs WebSocket API.
+
+    Text is forwarded word by word as the LLM produces it, and audio comes back
+    on the same connection, so playback can begin before the reply is finished
+    and ElevenLabs keeps prosody consistent across chunks.
+
+    Args:
+        text_iter: Async iterable of text tokens (e.g. a Gemini stream)
+        voice_id: ElevenLabs voice ID (defaults to warm female voice)
+        model: ElevenLabs model ID (defaults to turbo for speed)
+
+    Yields:
+        Audio chunks as bytes (mp3 format)
+    """
+    api_key = os.getenv("ELEVENLABS_API_KEY")
+    if not api_key:
+        raise ValueError("ELEVENLABS_API_KEY environment variable not set")
+
+    voice = voice_id or os.getenv("ELEVENLABS_VOICE_ID", DEFAULT_VOICE_ID)
+    url = ELEVENLABS_STREAM_INPUT_URL.format(
+        voice_id=voice,
+        model_id=model or DEFAULT_MODEL,
+        output_format=OUTPUT_FORMAT,
+        latency=STREAMING_LATENCY,
+    )
+
+    # TTFB is measured from the first text sent, so LLM latency isn't counted
+    first_text_ns: Optional[int] = None
+
+    async with websockets.connect(url) as ws:
+        # Beginning-of-stream message carries auth and voice settings
+        await ws.send(
+            json.dumps(
+                {
+                    "text": " ",
+                    "voice_settings": VOICE_SETTINGS.model_dump(exclude_none=True),
+                    "xi_api_key": api_key,
+                }
+            )
+        )
+
+        async def send_text():
+            nonlocal first_text_ns
+            # Forward whole words only; ElevenLabs expects chunks ending in a space
+            buffer = ""
+            try:
+                async for token in text_iter:
+                    buffer += token
+                    cut = buffer.rfind(" ") + 1
+                    if cut:
+                        if first_text_ns is None:
+                            first_text_ns = time.perf_counter_ns()
+                        await ws.send(
+                            json.dumps({"text": buffer[:cut], "try_trigger_generation": True})
+                        )
+                        buffer = buffer[cut:]
+                if buffer:
+                    if first_text_ns is None:
+                        first_text_ns = time.perf_counter_ns()
+                    await ws.send(json.dumps({"text": buffer + " "}))
+            finally:
+                # End-of-stream: an empty string flushes remaining audio
+                await ws.send(json.dumps({"text": ""}))
+
+        sender = asyncio.create_task(send_text())
+        first = True
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                if data.get("audio"):
+                    if first and first_text_ns is not None:
+                        record_tts_ttfb(voice, (time.perf_counter_ns() - first_text_ns) / 1e6)
+                        first = False
+                    yield base64.b64decode(data["audio"])
+                if data.get("isFinal"):
+                    break
+            await sender
+        finally:
+            sender.cancel()
+
+
 async def synthesize_speech(
     text: str, voice_id: Optional[str] = None, model: Optional[str] = None
 ) -> str:
@@ -89,9 +217,7 @@ async def synthesize_speech(
     Returns:
         Base64-encoded MP3 audio string
     """
-    chunks = []
-    async for chunk in synthesize_speech_streaming(text, voice_id, model):
-        chunks.append(chunk)
+    chunks = [chunk async for chunk in synthesize_speech_streaming(text, voice_id, model)]
 
     audio_bytes = b"".join(chunks)
     return base64.b64encode(audio_bytes).decode("utf-8")
@@ -111,13 +237,16 @@ async def synthesize_speech_bytes(
     Returns:
         Raw MP3 audio bytes
     """
-    chunks = []
-    async for chunk in synthesize_speech_streaming(text, voice_id, model):
-        chunks.append(chunk)
+    chunks = [chunk async for chunk in synthesize_speech_streaming(text, voice_id, model)]
 
     return b"".join(chunks)
 
 
+async def warm_up() -> None:
+    """Synthesize a tiny clip so the first real utterance hits a warm connection."""
+    await synthesize_speech_bytes("ok")
+
+
 def get_available_voices() -> list:
     """
     Get list of available ElevenLabs voices for configuration.
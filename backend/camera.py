@@ -1,15 +1,138 @@
+import math
+import os
 import time
 from collections import deque
+from itertools import islice
 
 import cv2
 import numpy as np
 from scipy import signal as scipy_signal
-from scipy.fft import fft, fftfreq
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    # Numba is optional; without it the NumPy kernels below run uncompiled
+    # and pixel-loop kernels are bypassed for their vectorized equivalents
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# KCF ships with opencv-contrib; without it the last detected box is reused
+# between detections instead of being tracked
+_create_face_tracker = getattr(cv2, "TrackerKCF_create", None)
+
+# YuNet (cv2.FaceDetectorYN, OpenCV >= 4.5.4) is a small SIMD-optimized CNN
+# detector, faster and more accurate than the Haar cascade. The ONNX models are
+# not bundled with opencv-python; download them from the OpenCV model zoo into
+# backend/models (or point YUNET_MODEL_PATH at one), otherwise the cascade is
+# used. The int8-quantized model is preferred: it uses VNNI on recent CPUs and
+# halves the weight traffic.
+_MODELS_DIR = os.path.join(os.path.dirname(__file__), "models")
+YUNET_MODEL_PATHS = [
+    path
+    for path in (
+        os.getenv("YUNET_MODEL_PATH"),
+        os.path.join(_MODELS_DIR, "face_detection_yunet_2023mar_int8.onnx"),
+        os.path.join(_MODELS_DIR, "face_detection_yunet_2023mar.onnx"),
+    )
+    if path
+]
+
+
+def _create_face_detector():
+    """
+    Build a YuNet detector, or return None to fall back to the Haar cascade.
+
+    Tries each available model on OpenVINO first, then OpenCV's own CPU
+    backend. A backend or model this build can't run only fails on the first
+    inference, so each candidate is warmed up on a blank frame.
+    """
+    if not hasattr(cv2, "FaceDetectorYN"):
+        return None
+
+    backends = [cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE, cv2.dnn.DNN_BACKEND_OPENCV]
+    blank = np.zeros((320, 320, 3), dtype=np.uint8)
+    for model_path in YUNET_MODEL_PATHS:
+        if not os.path.exists(model_path):
+            continue
+        for backend in backends:
+            try:
+                detector = cv2.FaceDetectorYN.create(
+                    model_path, "", (320, 320), 0.9, 0.3, 5000,
+                    backend, cv2.dnn.DNN_TARGET_CPU,
+                )
+                detector.detect(blank)
+                return detector
+            except cv2.error:
+                continue
+    return None
+
+
+@njit(cache=True)
+def _rmssd_ms(peaks, fs):
+    """RMSSD (ms) of the physiologically valid R-R intervals, or NaN if too few."""
+    rr_intervals = np.diff(peaks) * (1000.0 / fs)
+    # 300-2000ms = 30-200 BPM
+    valid_rr = rr_intervals[(rr_intervals >= 300.0) & (rr_intervals <= 2000.0)]
+    if valid_rr.size < 3:
+        return np.nan
+    # Sum of squares as a dot product, with no squared-diffs temporary
+    successive_diffs = np.diff(valid_rr)
+    return math.sqrt(successive_diffs @ successive_diffs / successive_diffs.size)
+
+
+@njit(cache=True)
+def _roi_ppg_sum(frame, boxes):
+    """
+    Sum of 0.7*G + 0.3*R over the (x0, y0, x1, y1) boxes, and their total area.
+
+    Reads each ROI pixel once straight from the BGR frame, with no crops,
+    channel splits or integral image in between.
+    """
+    total = 0.0
+    area = 0
+    for i in range(boxes.shape[0]):
+        x0, y0, x1, y1 = boxes[i, 0], boxes[i, 1], boxes[i, 2], boxes[i, 3]
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                total += 0.7 * frame[yy, xx, 1] + 0.3 * frame[yy, xx, 2]
+        area += (x1 - x0) * (y1 - y0)
+    return total, area
+
+
+if NUMBA_AVAILABLE:
+    # Compile (or load from the cache) at import, not on the first camera frame
+    _roi_ppg_sum(np.zeros((1, 1, 3), np.uint8), np.zeros((1, 4), np.int64))
+
+
+@njit(cache=True)
+def _minmax_normalize(signal):
+    """Scale a signal to [0, 1]."""
+    lo = signal.min()
+    return (signal - lo) / (signal.max() - lo + 1e-10)
 
 
 class HeartRateMonitor:
+    # ROI placement as fractions of the face box (x, y, w, h):
+    # forehead, left cheek, right cheek
+    ROI_FRACTIONS = np.array(
+        [
+            [0.25, 0.05, 0.5, 0.15],
+            [0.1, 0.45, 0.25, 0.25],
+            [0.65, 0.45, 0.25, 0.25],
+        ]
+    )
+    ROI_COLORS = ((0, 255, 0), (0, 200, 200), (0, 200, 200))
+
     def __init__(self):
         self.cap = cv2.VideoCapture(0)
+        # Keep only the newest frame queued so timestamps match capture time,
+        # and ask for MJPG to cut USB bandwidth
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
 
         # Get actual camera FPS
         self.cap.set(cv2.CAP_PROP_FPS, 30)
@@ -19,13 +142,23 @@ class HeartRateMonitor:
         print(f"Camera FPS: {self.fps}")
 
         self.buffer_size = int(self.fps * 15)  # 15 seconds of data
-        self.signal_buffer = deque(maxlen=self.buffer_size)
-        self.time_buffer = deque(maxlen=self.buffer_size)
+        # Preallocated ring buffers; _write is the next slot, _count the fill
+        self.signal_buffer = np.empty(self.buffer_size, dtype=np.float32)
+        self.time_buffer = np.empty(self.buffer_size, dtype=np.float64)
+        self._write = 0
+        self._count = 0
+        # Samples are resampled onto a uniform grid at this rate for analysis
+        self.resample_fs = 30.0
+        self.grid_size = int(self.resample_fs * 15)
 
         # Face detection
         self.face_cascade = cv2.CascadeClassifier(
             cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
         )
+        self.face_detector = _create_face_detector()
+        # Run the cascade through OpenCV's T-API on an OpenCL device if present
+        self._use_opencl = cv2.ocl.haveOpenCL()
+        cv2.ocl.setUseOpenCL(self._use_opencl)
 
         self.current_hr = None
         self.current_hrv = None
@@ -35,123 +168,238 @@ class HeartRateMonitor:
         # Bandpass filter for heart rate (0.7 - 3.0 Hz = 42-180 BPM)
         self.lowcut = 0.7
         self.highcut = 3.0
+        # SOS filter per sample rate, keyed to the nearest 0.1 Hz
+        self._filter_cache = {}
+        # Centered quadratic basis and its moments for the last signal length
+        self._detrend_basis = None
+        # Candidate HR frequencies (Hz); the Hanning window and cos/sin basis
+        # for the full-length grid are kept as ((length, rate), arrays)
+        self._hr_freqs = np.linspace(self.lowcut, self.highcut, 50)
+        self._spectral_basis_cache = None
 
         self.start_time = time.time()
         self.last_face = None
 
+        # Haar detection dominates per-frame CPU, while the face moves slowly
+        # relative to the PPG window: detect every Nth frame, reuse in between
+        self._face_interval = 10
+        self._frame_idx = 0
+        # Cascade cost scales with area; detect at half resolution
+        self._detect_downscale = 2
+        self._tracker = None
+
+    def detect_face(self, frame):
+        """
+        Return the tracked face box (x, y, w, h), or None if no face is found.
+
+        The cascade runs every `_face_interval` frames, or on every frame while
+        no face is held; in between a KCF tracker follows the face (when
+        available), falling back to the cascade as soon as it loses it.
+        """
+        run_detection = (
+            self.last_face is None or self._frame_idx % self._face_interval == 0
+        )
+        self._frame_idx += 1
+        if not run_detection:
+            if self._tracker is None:
+                return self.last_face
+            ok, bbox = self._tracker.update(frame)
+            if ok:
+                self.last_face = tuple(int(v) for v in bbox)
+                return self.last_face
+            self._tracker = None
+
+        # Downscale first so the grayscale conversion touches a quarter of the pixels
+        scale = self._detect_downscale
+        small = cv2.resize(
+            frame,
+            (frame.shape[1] // scale, frame.shape[0] // scale),
+            interpolation=cv2.INTER_AREA,
+        )
+        min_side = 100 // scale
+
+        if self.face_detector is not None:
+            # YuNet takes BGR directly; rows are x, y, w, h, landmarks, score
+            self.face_detector.setInputSize((small.shape[1], small.shape[0]))
+            _, detections = self.face_detector.detect(small)
+            faces = np.empty((0, 4), dtype=int)
+            if detections is not None:
+                faces = detections[:, :4].astype(int)
+                faces = faces[(faces[:, 2] >= min_side) & (faces[:, 3] >= min_side)]
+        else:
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            if self._use_opencl:
+                gray = cv2.UMat(gray)
+            faces = self.face_cascade.detectMultiScale(
+                gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_side, min_side)
+            )
+
+        if len(faces) == 0:
+            self.last_face = None
+            self._tracker = None
+            return None
+
+        # Back to full-resolution coordinates for ROIs and drawing
+        faces = faces * scale
+
+        # Use largest face or previously tracked face for stability
+        if self.last_face is not None:
+            # Find face closest to last position (L1 distance)
+            offsets = faces[:, :2] - np.asarray(self.last_face[:2])
+            idx = np.abs(offsets).sum(axis=1).argmin()
+        else:
+            idx = (faces[:, 2] * faces[:, 3]).argmax()  # Largest face
+        face = tuple(int(v) for v in faces[idx])
+
+        self.last_face = face
+
+        # Re-seed the tracker from every detection so drift can't accumulate
+        if _create_face_tracker is not None:
+            self._tracker = _create_face_tracker()
+            self._tracker.init(frame, face)
+
+        return face
+
+    def add_sample(self, value, timestamp):
+        """Append one PPG sample to the ring buffers, overwriting the oldest."""
+        self.signal_buffer[self._write] = value
+        self.time_buffer[self._write] = timestamp
+        self._write = (self._write + 1) % self.buffer_size
+        self._count = min(self._count + 1, self.buffer_size)
+
+    def _ordered(self, buffer):
+        """Chronological view of a ring buffer; copies only once it has wrapped."""
+        if self._count < self.buffer_size:
+            return buffer[: self._count]
+        return np.concatenate((buffer[self._write :], buffer[: self._write]))
+
     def create_bandpass_filter(self, lowcut, highcut, fs, order=3):
-        """Create Butterworth bandpass filter"""
+        """Create Butterworth bandpass filter as second-order sections"""
         nyq = 0.5 * fs
         low = lowcut / nyq
         high = highcut / nyq
         # Clamp to valid range
         low = max(0.01, min(low, 0.99))
         high = max(low + 0.01, min(high, 0.99))
-        b, a = scipy_signal.butter(order, [low, high], btype="band")
-        return b, a
+        return scipy_signal.butter(order, [low, high], btype="band", output="sos")
 
     def bandpass_filter(self, data, lowcut, highcut, fs, order=3):
         """Apply bandpass filter to signal"""
-        b, a = self.create_bandpass_filter(lowcut, highcut, fs, order)
-        # Use filtfilt for zero-phase filtering
-        y = scipy_signal.filtfilt(
-            b, a, data, padlen=min(len(data) - 1, 3 * max(len(a), len(b)))
-        )
-        return y
+        # Measured fs jitters only slightly, so design the filter once per bucket
+        key = (round(fs * 10), lowcut, highcut, order)
+        sos = self._filter_cache.get(key)
+        if sos is None:
+            sos = self.create_bandpass_filter(lowcut, highcut, fs, order)
+            self._filter_cache[key] = sos
+        # Use sosfiltfilt for zero-phase filtering; cascaded biquads are
+        # numerically better behaved than the (b, a) transfer function
+        return scipy_signal.sosfiltfilt(sos, data)
+
+    def extract_ppg_signal(self, frame, rois):
+        """
+        Extract the combined PPG signal from all ROIs in a single pass.
 
-    def extract_ppg_signal(self, frame, roi):
-        """Extract PPG signal using green channel with spatial averaging"""
-        x, y, w, h = roi
+        With Numba, a compiled kernel sums the weighted channels over the ROI
+        pixels directly. Otherwise one summed-area table over the ROIs'
+        bounding box gives each ROI's channel sums from four corner lookups.
 
-        # Ensure ROI is within frame bounds
+        Returns:
+            Area-weighted signal over all ROIs, or None if every ROI is out of frame
+        """
+        # Clamp ROIs to the frame bounds, as (x0, y0, x1, y1)
         h_frame, w_frame = frame.shape[:2]
-        x = max(0, min(x, w_frame - 1))
-        y = max(0, min(y, h_frame - 1))
-        w = min(w, w_frame - x)
-        h = min(h, h_frame - y)
-
-        if w <= 0 or h <= 0:
+        x = np.clip(rois[:, 0], 0, w_frame - 1)
+        y = np.clip(rois[:, 1], 0, h_frame - 1)
+        w = np.minimum(rois[:, 2], w_frame - x)
+        h = np.minimum(rois[:, 3], h_frame - y)
+        valid = (w > 0) & (h > 0)
+        if not valid.any():
             return None
 
-        roi_frame = frame[y : y + h, x : x + w]
+        boxes = np.stack([x, y, x + w, y + h], axis=1)[valid]
 
-        if roi_frame.size == 0:
-            return None
+        # Pool pixels across ROIs (an area-weighted mean of the per-ROI
+        # means), so the large forehead patch outweighs the cheeks
+        if NUMBA_AVAILABLE:
+            # Compiled loop: one pass over the ROI pixels, nothing allocated
+            total, area = _roi_ppg_sum(frame, boxes)
+            return total / area
 
-        # Use green channel (best for PPG) with some red channel
-        # Green has strongest PPG signal in skin
-        b, g, r = cv2.split(roi_frame)
+        x0, y0 = boxes[:, :2].min(axis=0)
+        x1, y1 = boxes[:, 2:].max(axis=0)
+        integ = cv2.integral(frame[y0:y1, x0:x1])  # (H+1, W+1, 3) int32
 
-        # Weighted combination - green is primary
-        signal = 0.7 * np.mean(g) + 0.3 * np.mean(r)
+        left, top = boxes[:, 0] - x0, boxes[:, 1] - y0
+        right, bottom = boxes[:, 2] - x0, boxes[:, 3] - y0
+        sums = (
+            integ[bottom, right] - integ[top, right]
+            - integ[bottom, left] + integ[top, left]
+        )
+        means = sums.sum(axis=0) / ((right - left) * (bottom - top)).sum()  # BGR
 
-        return signal
+        # Use green channel (best for PPG) with some red channel
+        # Weighted combination - green is primary
+        return float(0.7 * means[1] + 0.3 * means[2])
 
     def get_face_rois(self, frame, face):
-        """Get multiple ROIs from face for better signal"""
+        """Get multiple ROIs from face for better signal, as an (n, 4) int array"""
         x, y, w, h = face
-
-        rois = {}
-
-        # Forehead ROI
-        rois["forehead"] = (
-            x + int(w * 0.25),
-            y + int(h * 0.05),
-            int(w * 0.5),
-            int(h * 0.15),
-        )
-
-        # Left cheek
-        rois["left_cheek"] = (
-            x + int(w * 0.1),
-            y + int(h * 0.45),
-            int(w * 0.25),
-            int(h * 0.25),
-        )
-
-        # Right cheek
-        rois["right_cheek"] = (
-            x + int(w * 0.65),
-            y + int(h * 0.45),
-            int(w * 0.25),
-            int(h * 0.25),
-        )
-
-        return rois
+        return (self.ROI_FRACTIONS * (w, h, w, h) + (x, y, 0, 0)).astype(int)
 
     def detrend_signal(self, signal):
         """Remove slow trends from signal using polynomial detrending"""
-        if len(signal) < 10:
+        n = len(signal)
+        if n < 10:
             return signal
-        x = np.arange(len(signal))
-        # Fit and remove 2nd order polynomial trend
-        coeffs = np.polyfit(x, signal, 2)
-        trend = np.polyval(coeffs, x)
+
+        # Fit and remove 2nd order polynomial trend. With x centered, the odd
+        # moments vanish and the least-squares normal equations solve in
+        # closed form, so only three dot products depend on the signal.
+        if self._detrend_basis is None or self._detrend_basis[0] != n:
+            x = np.arange(n, dtype=np.float64) - (n - 1) / 2
+            x2 = x * x
+            m2 = x2.sum()
+            m4 = x2 @ x2
+            self._detrend_basis = (n, x, x2, m2, m4, n * m4 - m2 * m2)
+        _, x, x2, m2, m4, det = self._detrend_basis
+
+        s0 = signal.sum(dtype=np.float64)
+        s1 = x @ signal
+        s2 = x2 @ signal
+        c1 = s1 / m2
+        c2 = (n * s2 - m2 * s0) / det
+        c0 = (m4 * s0 - m2 * s2) / det
+        trend = c0 + c1 * x + c2 * x2
         return signal - trend
 
+    def _spectral_basis(self, n, fs):
+        """Hanning window and cos/sin basis at the HR frequencies for length n"""
+        key = (n, fs)
+        if self._spectral_basis_cache is not None and self._spectral_basis_cache[0] == key:
+            return self._spectral_basis_cache[1]
+
+        phase = 2 * np.pi * np.outer(self._hr_freqs / fs, np.arange(n))
+        basis = (np.hanning(n), np.cos(phase), np.sin(phase))
+        # Only the full grid is kept: while the buffer fills, n grows by about
+        # a sample per frame, so a basis per shorter length would never be reused
+        if n == self.grid_size:
+            self._spectral_basis_cache = (key, basis)
+        return basis
+
     def calculate_hr_fft(self, signal, fs):
-        """Calculate heart rate using FFT - more robust"""
+        """Calculate heart rate from the spectral peak - more robust"""
         n = len(signal)
+        window, cos_basis, sin_basis = self._spectral_basis(n, fs)
 
         # Apply Hanning window to reduce spectral leakage
-        window = np.hanning(n)
         signal_windowed = signal * window
 
-        # Compute FFT
-        yf = np.abs(fft(signal_windowed))
-        xf = fftfreq(n, 1 / fs)
-
-        # Only look at positive frequencies in heart rate range
-        mask = (xf >= self.lowcut) & (xf <= self.highcut)
-        xf_hr = xf[mask]
-        yf_hr = yf[mask]
-
-        if len(yf_hr) == 0:
-            return None
+        # Narrow-band DFT: evaluate power only at the candidate HR frequencies
+        # instead of computing the full spectrum and masking most of it away
+        power = (cos_basis @ signal_windowed) ** 2 + (sin_basis @ signal_windowed) ** 2
 
         # Find peak frequency
-        peak_idx = np.argmax(yf_hr)
-        peak_freq = xf_hr[peak_idx]
+        peak_freq = self._hr_freqs[np.argmax(power)]
 
         # Convert to BPM
         hr = peak_freq * 60
@@ -184,19 +432,11 @@ class HeartRateMonitor:
         if peaks is None or len(peaks) < 3:
             return None
 
-        # Calculate R-R intervals in milliseconds
-        rr_intervals = np.diff(peaks) / fs * 1000  # Convert to ms
-
-        # Filter physiologically valid intervals (300-2000ms = 30-200 BPM)
-        valid_rr = rr_intervals[(rr_intervals >= 300) & (rr_intervals <= 2000)]
-
-        if len(valid_rr) < 3:
+        # R-R intervals, validity filter and RMSSD run in one compiled kernel
+        rmssd = _rmssd_ms(np.asarray(peaks, dtype=np.int64), float(fs))
+        if np.isnan(rmssd):
             return None
 
-        # Calculate RMSSD (most common HRV metric for short-term measurements)
-        successive_diffs = np.diff(valid_rr)
-        rmssd = np.sqrt(np.mean(successive_diffs**2))
-
         # Typical RMSSD values range from 20-100ms for healthy adults
         # Values outside this range may indicate measurement issues
         if rmssd < 5 or rmssd > 200:
@@ -210,9 +450,7 @@ class HeartRateMonitor:
         min_distance = int(fs * 0.4)  # Minimum 0.4s between beats (150 BPM max)
 
         # Normalize signal
-        signal_norm = (signal - np.min(signal)) / (
-            np.max(signal) - np.min(signal) + 1e-10
-        )
+        signal_norm = _minmax_normalize(signal)
 
         peaks, properties = scipy_signal.find_peaks(
             signal_norm, distance=min_distance, prominence=0.1, height=0.3
@@ -242,21 +480,20 @@ class HeartRateMonitor:
         """Calculate heart rate using multiple methods"""
         min_samples = int(self.fps * 5)  # Need at least 5 seconds
 
-        if len(self.signal_buffer) < min_samples:
+        if self._count < min_samples:
             return None, None
 
         try:
-            signal = np.array(self.signal_buffer)
-
-            # Calculate actual sample rate from timestamps
-            if len(self.time_buffer) > 1:
-                time_arr = np.array(self.time_buffer)
-                actual_duration = time_arr[-1] - time_arr[0]
-                actual_fs = (
-                    len(signal) / actual_duration if actual_duration > 0 else self.fps
-                )
-            else:
-                actual_fs = self.fps
+            # Resample onto a uniform grid ending at the newest sample: webcam
+            # timestamps jitter, while the filter and spectrum assume even
+            # spacing. A fixed rate and length also keep their caches warm.
+            time_arr = self._ordered(self.time_buffer)
+            fs = self.resample_fs
+            n = min(self.grid_size, int((time_arr[-1] - time_arr[0]) * fs) + 1)
+            if n < int(fs * 5):
+                return None, None
+            t_grid = time_arr[-1] - np.arange(n - 1, -1, -1) / fs
+            signal = np.interp(t_grid, time_arr, self._ordered(self.signal_buffer))
 
             # Step 1: Detrend to remove slow drifts
             signal = self.detrend_signal(signal)
@@ -267,16 +504,16 @@ class HeartRateMonitor:
             # Step 3: Bandpass filter
             try:
                 signal_filtered = self.bandpass_filter(
-                    signal, self.lowcut, self.highcut, actual_fs
+                    signal, self.lowcut, self.highcut, fs
                 )
             except Exception:
                 signal_filtered = signal
 
             # Method 1: FFT-based (more robust)
-            hr_fft = self.calculate_hr_fft(signal_filtered, actual_fs)
+            hr_fft = self.calculate_hr_fft(signal_filtered, fs)
 
             # Method 2: Peak detection (also returns peaks for HRV)
-            hr_peaks, peaks = self.calculate_hr_peaks(signal_filtered, actual_fs)
+            hr_peaks, peaks = self.calculate_hr_peaks(signal_filtered, fs)
 
             # Combine results
             hr_estimates = [
@@ -294,14 +531,20 @@ class HeartRateMonitor:
 
             # Return smoothed HR (median of last few readings)
             if len(self.hr_history) >= 3:
-                smoothed_hr = np.median(list(self.hr_history)[-5:])
+                # Plain sort of at most 5 floats beats np.median's array round-trip
+                recent = sorted(islice(reversed(self.hr_history), 5))
+                mid = len(recent) // 2
+                if len(recent) % 2:
+                    smoothed_hr = recent[mid]
+                else:
+                    smoothed_hr = (recent[mid - 1] + recent[mid]) / 2
             else:
                 smoothed_hr = hr
 
             # Calculate proper HRV using RMSSD from inter-beat intervals
             hrv = None
             if peaks is not None and len(peaks) >= 3:
-                hrv = self.calculate_hrv_from_peaks(peaks, actual_fs)
+                hrv = self.calculate_hrv_from_peaks(peaks, fs)
                 self.last_peaks = peaks  # Store for reference
 
             # If HRV calculation failed, return None instead of 0
@@ -335,51 +578,25 @@ class HeartRateMonitor:
             current_time = time.time()
 
             # Detect face
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
-                gray, scaleFactor=1.1, minNeighbors=5, minSize=(100, 100)
-            )
-
-            if len(faces) > 0:
-                # Use largest face or previously tracked face for stability
-                if self.last_face is not None:
-                    # Find face closest to last position
-                    face = min(
-                        faces,
-                        key=lambda f: abs(f[0] - self.last_face[0])
-                        + abs(f[1] - self.last_face[1]),
-                    )
-                else:
-                    face = max(faces, key=lambda f: f[2] * f[3])  # Largest face
-
-                self.last_face = face
+            face = self.detect_face(frame)
 
+            if face is not None:
                 # Get multiple ROIs
                 rois = self.get_face_rois(frame, face)
 
+                # Extract before drawing so the overlay doesn't leak into the signal
+                combined_signal = self.extract_ppg_signal(frame, rois)
+                if combined_signal is not None:
+                    self.add_sample(combined_signal, current_time)
+
                 # Draw face box
                 x, y, w, h = face
                 cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 0, 0), 2)
 
-                # Extract signals from all ROIs and average them
-                signals = []
-                for name, roi in rois.items():
-                    rx, ry, rw, rh = roi
-                    # Draw ROI
-                    color = (0, 255, 0) if name == "forehead" else (0, 200, 200)
+                # Draw ROIs
+                for (rx, ry, rw, rh), color in zip(rois.tolist(), self.ROI_COLORS):
                     cv2.rectangle(frame, (rx, ry), (rx + rw, ry + rh), color, 2)
 
-                    # Extract signal
-                    sig = self.extract_ppg_signal(frame, roi)
-                    if sig is not None:
-                        signals.append(sig)
-
-                if signals:
-                    # Average all ROI signals for robustness
-                    combined_signal = np.mean(signals)
-                    self.signal_buffer.append(combined_signal)
-                    self.time_buffer.append(current_time)
-
                 # Calculate every 15 frames (~0.5 second)
                 if frame_count % 15 == 0:
                     hr, hrv = self.calculate_vitals()
@@ -439,7 +656,7 @@ class HeartRateMonitor:
                         2,
                     )
                 else:
-                    buffer_progress = len(self.signal_buffer)
+                    buffer_progress = self._count
                     min_needed = int(self.fps * 3)
                     progress = min(100, buffer_progress / min_needed * 100)
                     cv2.putText(
@@ -461,7 +678,6 @@ class HeartRateMonitor:
                         2,
                     )
             else:
-                self.last_face = None
                 cv2.putText(
                     frame,
                     "No face detected",
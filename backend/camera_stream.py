@@ -5,14 +5,23 @@ Streams video frames and vitals data to the frontend.
 """
 
 import asyncio
-import base64
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
-import numpy as np
+import orjson
 from camera import HeartRateMonitor
 from fastapi import WebSocket, WebSocketDisconnect
 
+try:
+    from turbojpeg import TJPF_BGR, TJSAMP_420, TurboJPEG
+    _turbo_jpeg = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except (ImportError, OSError, RuntimeError):
+    # PyTurboJPEG is optional and also needs the libturbojpeg shared library
+    TURBOJPEG_AVAILABLE = False
+
 
 class WebSocketHeartRateMonitor(HeartRateMonitor):
     """Extended HeartRateMonitor that can stream frames via WebSocket"""
@@ -21,86 +30,130 @@ class WebSocketHeartRateMonitor(HeartRateMonitor):
         super().__init__()
         self.is_running = False
 
-    def get_frame_data(self):
-        """Process one frame and return data for streaming"""
-        ret, frame = self.cap.read()
-        if not ret:
+        # Single-slot hand-off from the capture thread: only the newest
+        # (frame, timestamp) is kept, so slow consumers drop stale frames
+        self._latest = None
+        self._frame_ready = threading.Condition()
+        self._capture_thread = None
+
+        # HR can't move meaningfully within a few frames of a 15 s window,
+        # so vitals are recomputed every Nth sample rather than every frame
+        self._vitals_interval = 5
+        self._samples_since_vitals = 0
+
+    def start(self):
+        """Start reading frames on a background capture thread"""
+        self.is_running = True
+        self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._capture_thread.start()
+
+    def _capture_loop(self):
+        """Read frames at the camera's pace, overwriting the latest slot"""
+        while self.is_running:
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+
+            # Timestamp at capture so processing delays don't skew the PPG timing
+            with self._frame_ready:
+                self._latest = (frame, time.time())
+                self._frame_ready.notify()
+
+    def _next_frame(self, timeout=1.0):
+        """Take the newest captured frame, waiting for one if none is pending"""
+        if self._capture_thread is None:
+            ret, frame = self.cap.read()
+            return (frame, time.time()) if ret else None
+
+        with self._frame_ready:
+            self._frame_ready.wait_for(
+                lambda: self._latest is not None or not self.is_running, timeout
+            )
+            latest, self._latest = self._latest, None
+        return latest
+
+    def process_frame(self):
+        """
+        Run face detection, ROI extraction and vitals on the newest frame.
+
+        Returns:
+            (annotated frame, vitals data dict), or None if no frame arrived
+        """
+        latest = self._next_frame()
+        if latest is None:
             return None
+        frame, current_time = latest
 
-        current_time = __import__("time").time()
+        # Detect face (the cascade only runs every few frames)
+        face = self.detect_face(frame)
 
-        # Detect face
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray, scaleFactor=1.1, minNeighbors=5, minSize=(100, 100)
-        )
-
-        face_detected = len(faces) > 0
+        face_detected = face is not None
 
         if face_detected:
-            # Use largest face or previously tracked face for stability
-            if self.last_face is not None:
-                face = min(
-                    faces,
-                    key=lambda f: abs(f[0] - self.last_face[0])
-                    + abs(f[1] - self.last_face[1]),
-                )
-            else:
-                face = max(faces, key=lambda f: f[2] * f[3])
-
-            self.last_face = face
-
             # Get ROIs
             rois = self.get_face_rois(frame, face)
 
+            # Extract before drawing so the overlay doesn't leak into the signal
+            combined_signal = self.extract_ppg_signal(frame, rois)
+            if combined_signal is not None:
+                self.add_sample(combined_signal, current_time)
+                self._samples_since_vitals += 1
+
             # Draw face box
             x, y, w, h = face
             cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 0, 0), 2)
 
-            # Extract signals from all ROIs
-            signals = []
-            for name, roi in rois.items():
-                rx, ry, rw, rh = roi
-                color = (0, 255, 0) if name == "forehead" else (0, 200, 200)
+            # Draw ROIs
+            for (rx, ry, rw, rh), color in zip(rois.tolist(), self.ROI_COLORS):
                 cv2.rectangle(frame, (rx, ry), (rx + rw, ry + rh), color, 2)
 
-                sig = self.extract_ppg_signal(frame, roi)
-                if sig is not None:
-                    signals.append(sig)
-
-            if signals:
-                combined_signal = np.mean(signals)
-                self.signal_buffer.append(combined_signal)
-                self.time_buffer.append(current_time)
-
             # Calculate vitals
-            hr, hrv = self.calculate_vitals()
-            if hr is not None:
-                self.current_hr = hr
-                self.current_hrv = hrv
-
-        else:
-            self.last_face = None
-
-        # Encode frame to JPEG then base64
-        _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-        frame_base64 = base64.b64encode(buffer).decode("utf-8")
-
-        return {
-            "frame": frame_base64,
+            if self._samples_since_vitals >= self._vitals_interval:
+                self._samples_since_vitals = 0
+                hr, hrv = self.calculate_vitals()
+                if hr is not None:
+                    self.current_hr = hr
+                    self.current_hrv = hrv
+
+        return frame, {
             "face_detected": face_detected,
             "heart_rate": round(self.current_hr) if self.current_hr else None,
             "hrv": round(self.current_hrv, 1) if self.current_hrv is not None else None,
             "confidence": min(100, len(self.hr_history) * 10),
             "calibration_progress": min(
-                100, len(self.signal_buffer) / (self.fps * 8) * 100
+                100, self._count / (self.fps * 8) * 100
             )
             if self.current_hr is None
             else 100,
         }
 
+    def encode_frame(self, frame, data):
+        """
+        Encode the annotated frame, returned alongside its vitals data.
+
+        Uses libjpeg-turbo's SIMD encoder straight from the BGR buffer when
+        PyTurboJPEG is installed, otherwise OpenCV's WebP encoder.
+        """
+        if TURBOJPEG_AVAILABLE:
+            data["frame_format"] = "jpeg"
+            frame_bytes = _turbo_jpeg.encode(
+                frame, quality=80, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420
+            )
+            return frame_bytes, data
+
+        data["frame_format"] = "webp"
+        _, buffer = cv2.imencode(".webp", frame, [cv2.IMWRITE_WEBP_QUALITY, 70])
+        return buffer.tobytes(), data
+
     def release(self):
-        """Release camera resources"""
+        """Stop the capture thread and release camera resources"""
+        self.is_running = False
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+        if self._capture_thread is not None:
+            self._capture_thread.join(timeout=1.0)
+            self._capture_thread = None
         if self.cap:
             self.cap.release()
 
@@ -109,36 +162,80 @@ class WebSocketHeartRateMonitor(HeartRateMonitor):
 active_monitors = {}
 
 
+async def _wait_for_stop(websocket: WebSocket):
+    """Return once the client sends "stop" or disconnects"""
+    try:
+        while await websocket.receive_text() != "stop":
+            pass
+    except WebSocketDisconnect:
+        print("WebSocket disconnected")
+
+
+async def _send_frames(websocket: WebSocket, queue: asyncio.Queue):
+    """Drain encoded frames to the client: vitals as JSON, then the frame"""
+    while True:
+        frame_bytes, data = await queue.get()
+        # orjson serializes the NumPy scalars in data directly; keep a text
+        # frame so the client can tell vitals from binary frames
+        payload = orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+        await websocket.send_text(payload.decode("utf-8"))
+        await websocket.send_bytes(frame_bytes)
+
+
+def _put_latest(queue: asyncio.Queue, item):
+    """Enqueue item, dropping the oldest entry if the queue is full"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+
 async def camera_websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for camera streaming"""
     await websocket.accept()
 
+    loop = asyncio.get_running_loop()
+    # One worker processes frame k+1 while the other encodes frame k
+    pool = ThreadPoolExecutor(max_workers=2)
+
     monitor = None
+    stop_task = None
+    send_task = None
     try:
         monitor = WebSocketHeartRateMonitor()
-        monitor.is_running = True
+        monitor.start()
+
+        # Listen for the stop command concurrently rather than polling each frame
+        stop_task = asyncio.create_task(_wait_for_stop(websocket))
+
+        # Sending runs on its own task behind a small latest-frame-wins queue,
+        # so a slow client drops frames instead of stalling processing
+        queue = asyncio.Queue(maxsize=2)
+        send_task = asyncio.create_task(_send_frames(websocket, queue))
 
-        while monitor.is_running:
-            data = monitor.get_frame_data()
-            if data:
-                await websocket.send_json(data)
+        pending = None
+        while monitor.is_running and not stop_task.done() and not send_task.done():
+            # Paced by the capture thread; blocks in the pool, not the event loop
+            processed = await loop.run_in_executor(pool, monitor.process_frame)
 
-            # ~30 FPS
-            await asyncio.sleep(0.033)
+            if pending is not None:
+                _put_latest(queue, await pending)
+                pending = None
+            if processed is not None:
+                pending = loop.run_in_executor(pool, monitor.encode_frame, *processed)
 
-            # Check for stop command
-            try:
-                msg = await asyncio.wait_for(websocket.receive_text(), timeout=0.001)
-                if msg == "stop":
-                    break
-            except asyncio.TimeoutError:
-                pass
+        # Surface a send failure (e.g. disconnect) to the handlers below
+        if send_task.done():
+            send_task.result()
 
     except WebSocketDisconnect:
         print("WebSocket disconnected")
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
+        for task in (stop_task, send_task):
+            if task:
+                task.cancel()
         if monitor:
             monitor.release()
+        pool.shutdown(wait=False)
         print("Camera released")
@@ -1,6 +1,5 @@
 # database.py
 import os
-from datetime import datetime
 
 from dotenv import load_dotenv
 from pymongo import MongoClient
@@ -13,9 +12,31 @@ MONGO_URI = os.getenv("MONGO_URI")
 if not MONGO_URI:
     raise ValueError("MONGO_URI not found in environment variables")
 
-client = MongoClient(MONGO_URI)
+# Keep a few connections open so bursts don't pay a fresh TCP/TLS handshake
+client = MongoClient(
+    MONGO_URI,
+    maxPoolSize=50,
+    minPoolSize=5,
+    serverSelectionTimeoutMS=3000,
+    retryReads=True,
+)
 db = client["chronic_disease_mvp"]
 
 # Collections
 patients = db["patients"]
 vitals = db["vitals"]
+
+
+def ensure_indexes():
+    """Create the indexes queries rely on (idempotent; needs a live server)"""
+    # Every vitals query filters by patient and sorts by time; the index
+    # serves both ascending and latest-first scans
+    vitals.create_index([("patient_id", 1), ("timestamp", -1)])
+
+
+def warm_up():
+    """Open pooled connections, touch both collections and ensure indexes"""
+    client.admin.command("ping")
+    patients.find_one()
+    vitals.find_one()
+    ensure_indexes()
@@ -1,21 +1,151 @@
 # db_helpers.py
+import itertools
+import threading
+import time
+from collections import OrderedDict
 from database import patients, vitals
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU whose entries expire ttl seconds after being stored"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        """Size and hit/miss counters since startup"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+# Profiles (name, conditions, baseline) change rarely but are read on every
+# vitals insert and every new chat session
+PROFILE_FIELDS = ("name", "age", "conditions", "baseline")
+PROFILE_CACHE_SIZE = 1024
+PROFILE_TTL_SECONDS = 60
+_profile_cache = TTLCache(PROFILE_CACHE_SIZE, PROFILE_TTL_SECONDS)
+
+# Trend slopes only change when a reading is stored (or slowly, as old ones
+# leave the window). Entries are keyed by the patient's vitals version, which
+# every insert bumps, so a new reading is picked up on the next request.
+TREND_CACHE_SIZE = 1024
+TREND_TTL_SECONDS = 60
+_trend_cache = TTLCache(TREND_CACHE_SIZE, TREND_TTL_SECONDS)
+_vitals_versions = {}  # patient_id -> version of their stored vitals
+_version_counter = itertools.count(1)
+
+# Patients seen to have no vitals, so "no data" answers can skip Mongo.
+# store_new_vital clears the entry; the TTL bounds how long a reading stored
+# by another process (e.g. seed_data.py) can go unnoticed.
+NO_VITALS_TTL_SECONDS = 30
+_no_vitals_cache = TTLCache(PROFILE_CACHE_SIZE, NO_VITALS_TTL_SECONDS)
 
 def get_patient(patient_id):
     """Get patient details"""
     return patients.find_one({"_id": patient_id})
 
-def get_recent_vitals(patient_id, days=7):
-    """Get last N days of vitals"""
-    cutoff = datetime.utcnow() - timedelta(days=days)
+@lru_cache(maxsize=1024)
+def _confirm_patient(patient_id):
+    # Misses raise instead of returning False: lru_cache doesn't cache
+    # exceptions, so a patient created later is picked up on the next call
+    if patients.find_one({"_id": patient_id}, {"_id": 1}) is None:
+        raise LookupError(patient_id)
+    return True
+
+def patient_exists(patient_id):
+    """Check a patient exists, caching hits to skip a round-trip per request"""
+    try:
+        return _confirm_patient(patient_id)
+    except LookupError:
+        return False
+
+def forget_patient_cache(patient_id):
+    """Drop cached existence checks and profile (call after deleting a patient)"""
+    _confirm_patient.cache_clear()
+    forget_patient_profile(patient_id)
+    _bump_vitals_version(patient_id)
+
+def forget_patient_profile(patient_id):
+    """Drop a patient's cached profile (call after updating the patient)"""
+    _profile_cache.pop(patient_id)
+
+def vitals_version(patient_id):
+    """
+    Changes whenever this process stores or deletes a patient's vitals; use
+    it in cache keys for anything derived from them
+    """
+    return _vitals_versions.get(patient_id, 0)
+
+def known_without_vitals(patient_id):
+    """True if the patient recently had no stored vitals"""
+    return _no_vitals_cache.get(patient_id, False)
+
+def mark_without_vitals(patient_id):
+    """Remember that a lookup found no vitals for this patient"""
+    _no_vitals_cache.put(patient_id, True)
+
+def cache_stats():
+    """Hit/miss counters for the caches in this module"""
+    return {
+        "profiles": _profile_cache.stats(),
+        "trends": _trend_cache.stats(),
+        "no_vitals": _no_vitals_cache.stats(),
+    }
+
+def _bump_vitals_version(patient_id):
+    # next() on a count is atomic, so concurrent inserts never share a version
+    _vitals_versions[patient_id] = next(_version_counter)
+
+def get_recent_vitals(patient_id, days=7, fields=None):
+    """Get last N days of vitals, optionally only the given fields (no _id)"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    projection = None
+    if fields:
+        projection = {field: 1 for field in fields}
+        projection["_id"] = 0
     
     results = list(vitals.find(
         {
             "patient_id": patient_id,
             "timestamp": {"$gte": cutoff}
-        }
-    ).sort("timestamp", 1))  # 1 = ascending
+        },
+        projection
+    ).sort("timestamp", 1).batch_size(1000))  # 1 = ascending
     
     return results
 
@@ -29,38 +159,123 @@ def store_new_vital(patient_id, heart_rate, hrv, quality_score):
     """Store new vitals measurement"""
     vital = {
         "patient_id": patient_id,
-        "timestamp": datetime.utcnow(),
+        "timestamp": datetime.now(timezone.utc),
         "heart_rate": heart_rate,
         "hrv": hrv,
         "quality_score": quality_score
     }
     
     result = vitals.insert_one(vital)
+    _bump_vitals_version(patient_id)
+    _no_vitals_cache.pop(patient_id)
     return str(result.inserted_id)
 
+def get_patient_profile(patient_id):
+    """
+    Get the PROFILE_FIELDS of a patient (None if missing), cached for
+    PROFILE_TTL_SECONDS. Treat the result as read-only; it is shared.
+    """
+    profile = _profile_cache.get(patient_id, _MISSING)
+    if profile is _MISSING:
+        profile = patients.find_one(
+            {"_id": patient_id}, {field: 1 for field in PROFILE_FIELDS}
+        )
+        # Misses aren't cached, so a patient created later is found at once
+        if profile is not None:
+            _profile_cache.put(patient_id, profile)
+    return profile
+
 def get_baseline(patient_id):
-    """Get patient's baseline vitals"""
-    patient = get_patient(patient_id)
-    if patient and "baseline" in patient:
-        return patient["baseline"]
-    return None
+    """Get patient's baseline vitals (from the cached profile)"""
+    profile = get_patient_profile(patient_id)
+    return profile.get("baseline") if profile else None
 
 def calculate_stats(patient_id, days=7):
     """Calculate statistics for recent vitals"""
-    recent = get_recent_vitals(patient_id, days)
-    
-    if not recent:
-        return None
-    
-    hrs = [v["heart_rate"] for v in recent]
-    hrvs = [v["hrv"] for v in recent]
-    
-    return {
-        "avg_hr": sum(hrs) / len(hrs),
-        "avg_hrv": sum(hrvs) / len(hrvs),
-        "min_hr": min(hrs),
-        "max_hr": max(hrs),
-        "min_hrv": min(hrvs),
-        "max_hrv": max(hrvs),
-        "count": len(recent)
-    }
\ No newline at end of file
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+
+    pipeline = [
+        {
+            "$match": {
+                "patient_id": patient_id,
+                "timestamp": {"$gte": cutoff}
+            }
+        },
+        {
+            "$group": {
+                "_id": None,
+                "avg_hr": {"$avg": "$heart_rate"},
+                "avg_hrv": {"$avg": "$hrv"},
+                "min_hr": {"$min": "$heart_rate"},
+                "max_hr": {"$max": "$heart_rate"},
+                "min_hrv": {"$min": "$hrv"},
+                "max_hrv": {"$max": "$hrv"},
+                "count": {"$sum": 1}
+            }
+        },
+        {"$project": {"_id": 0}}
+    ]
+
+    # Reduce server-side so only one summary document crosses the network
+    return next(vitals.aggregate(pipeline), None)
+
+def _slope(n, sx, sxx, sy, sxy):
+    """Least-squares slope from running sums"""
+    denominator = n * sxx - sx * sx
+    return (n * sxy - sx * sy) / denominator if denominator else 0.0
+
+def calculate_trend_stats(patient_id, days=7):
+    """
+    Linear-regression slopes (change per reading) of HR and HRV over the
+    last N days, as {"count", "hr_slope", "hrv_slope"}; None if no readings.
+
+    The regression sums are accumulated server-side, so only one small
+    document comes back however many readings there are. Results are cached
+    until the patient's next stored reading (or TREND_TTL_SECONDS).
+    """
+    key = (patient_id, days, vitals_version(patient_id))
+    cached = _trend_cache.get(key, _MISSING)
+    if cached is not _MISSING:
+        return cached
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+
+    pipeline = [
+        {
+            "$match": {
+                "patient_id": patient_id,
+                "timestamp": {"$gte": cutoff}
+            }
+        },
+        # Reading index in time order is the regression x (MongoDB 5.0+)
+        {
+            "$setWindowFields": {
+                "sortBy": {"timestamp": 1},
+                "output": {"x": {"$documentNumber": {}}}
+            }
+        },
+        {
+            "$group": {
+                "_id": None,
+                "n": {"$sum": 1},
+                "sx": {"$sum": "$x"},
+                "sxx": {"$sum": {"$multiply": ["$x", "$x"]}},
+                "sy_hr": {"$sum": "$heart_rate"},
+                "sxy_hr": {"$sum": {"$multiply": ["$x", "$heart_rate"]}},
+                "sy_hrv": {"$sum": "$hrv"},
+                "sxy_hrv": {"$sum": {"$multiply": ["$x", "$hrv"]}}
+            }
+        }
+    ]
+
+    sums = next(vitals.aggregate(pipeline), None)
+    trend = None
+    if sums:
+        n, sx, sxx = sums["n"], sums["sx"], sums["sxx"]
+        trend = {
+            "count": n,
+            "hr_slope": _slope(n, sx, sxx, sums["sy_hr"], sums["sxy_hr"]),
+            "hrv_slope": _slope(n, sx, sxx, sums["sy_hrv"], sums["sxy_hrv"]),
+        }
+    _trend_cache.put(key, trend)
+    return trend
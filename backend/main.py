@@ -1,26 +1,43 @@
 import asyncio
-import json
+import itertools
 import logging
 import os
 import sys
-from datetime import datetime
-from typing import Any, Dict, List, Optional
-
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from typing import (Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict,
+                    List, Optional, Union)
+
+import numpy as np
+import orjson
+from anyio import to_thread
 from agents import (create_health_data_chat_agent, create_pulse_chat_agent,
-                    run_agent_analysis, transcribe_base64)
-from agents.fallback_responses import (HARDCODED_NEUTRAL_FALLBACK,
-                                       SENSOR_MESSAGES,
-                                       get_icebreaker_question)
+                    run_agent_analysis, transcribe_audio, transcribe_base64)
+from agents.fallback_responses import SENSOR_MESSAGES
 from agents.llm_client import get_llm_client
-from agents.text_to_speech import synthesize_speech_streaming
+from agents.metrics import PROMETHEUS_AVAILABLE
+from agents.pulse_chat_agent import warm_up_gemini
+from agents.speech_to_text import close_stt_client, get_stt_client
+from agents.text_to_speech import (synthesize_speech_streaming,
+                                   synthesize_text_stream)
+from agents.text_to_speech import close_client as close_tts_client
+from agents.text_to_speech import warm_up as warm_up_tts
 from camera_stream import camera_websocket_endpoint
 from database import patients, vitals
-from db_helpers import (calculate_stats, get_all_vitals, get_baseline,
-                        get_patient, get_recent_vitals, store_new_vital)
+from database import warm_up as warm_up_database
+from db_helpers import (TTLCache, cache_stats, calculate_stats,
+                        calculate_trend_stats, forget_patient_cache,
+                        forget_patient_profile, get_all_vitals, get_baseline,
+                        get_patient, get_patient_profile, get_recent_vitals,
+                        known_without_vitals, mark_without_vitals,
+                        patient_exists, store_new_vital, vitals_version)
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import (FastAPI, HTTPException, Request, WebSocket,
+                     WebSocketDisconnect)
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, field_validator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,28 +46,38 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# uvicorn[standard] ships uvloop + httptools; Uvicorn creates the loop itself,
+# so they're selected by the run flags (see __main__ below), not a policy here
 try:
-    import uvloop
-
-    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    import uvloop  # noqa: F401
+    UVLOOP_AVAILABLE = True
 except ImportError:
+    # uvloop doesn't support Windows
+    UVLOOP_AVAILABLE = False
     if sys.platform.startswith("win"):
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-app = FastAPI(title="Chronic Disease MVP", version="1.0.0")
+
+app = FastAPI(
+    title="Chronic Disease MVP",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
 
 # CORS for Next.js frontend - allow configured origins plus localhost for dev
 frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
-allowed_origins = [
+allowed_origins = {
     "http://localhost:3000",
     "http://127.0.0.1:3000",
     "https://heypulsera.tech",
     "https://www.heypulsera.tech",
     frontend_url,
+}
+if frontend_url.startswith("http://"):
     # Also allow the https version if http was provided
-    frontend_url.replace("http://", "https://") if frontend_url.startswith("http://") else frontend_url,
-]
-# Remove duplicates
-allowed_origins = list(set(allowed_origins))
+    allowed_origins.add("https://" + frontend_url[len("http://"):])
+# CORSMiddleware checks `origin in allow_origins` per request; a frozenset
+# makes that a hash lookup instead of a list scan
+allowed_origins = frozenset(allowed_origins)
 
 app.add_middleware(
     CORSMiddleware,
@@ -60,62 +87,265 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Store active chat sessions
-active_chat_sessions: Dict[str, Any] = {}
+# Expose pipeline latency histograms (TTFT/TPOT/TTS TTFB) when available
+if PROMETHEUS_AVAILABLE:
+    from prometheus_client import make_asgi_app
+
+    app.mount("/metrics", make_asgi_app())
+
+# Threads for blocking work (PyMongo, sync LLM calls). Pooled MongoDB
+# connections (maxPoolSize=50) bound how many of these actually hit the DB
+BLOCKING_WORKERS = 64
+
+
+@app.on_event("startup")
+async def warm_up_clients():
+    """
+    Pre-warm the external AI services and the MongoDB pool so the first
+    greeting doesn't pay for TLS handshakes, auth and model routing.
+    Failures are logged, never fatal.
+    """
+    # asyncio.to_thread runs sync agent, Mongo and LLM calls on the default
+    # executor; its stock size (cpu_count + 4) caps concurrent sessions
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+    )
+    # Sync (def) routes doing PyMongo I/O run on AnyIO's threadpool instead,
+    # which defaults to 40 threads; give it the same headroom
+    to_thread.current_default_thread_limiter().total_tokens = BLOCKING_WORKERS
+
+    logger.info(f"Event loop: {type(asyncio.get_running_loop()).__name__}")
+
+    warmups = {"mongodb": asyncio.to_thread(warm_up_database)}
+    if os.getenv("GEMINI_API_KEY"):
+        warmups["gemini"] = warm_up_gemini()
+    if os.getenv("ELEVENLABS_API_KEY"):
+        warmups["elevenlabs"] = warm_up_tts()
+    if os.getenv("GROQ_API_KEY"):
+        get_stt_client()
+
+    results = await asyncio.gather(*warmups.values(), return_exceptions=True)
+    for name, result in zip(warmups, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Warm-up for {name} failed: {result}")
+        else:
+            logger.info(f"Warm-up for {name} complete")
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    """Release pooled HTTP connections."""
+    await close_stt_client()
+    close_tts_client()
+
+
+# Store active chat sessions, keyed by a process-unique integer id
+active_chat_sessions: Dict[int, Any] = {}
+_session_ids = itertools.count(1)
 
 # Track rPPG calibration status per session
 calibration_status: Dict[str, Dict[str, Any]] = {}
 
 
+# ============== WebSocket Helpers ==============
+
+
+async def receive_audio(
+    websocket: WebSocket, message: Dict[str, Any], data_key: str
+) -> Union[bytes, str]:
+    """
+    Get the audio for an "audio" message: the binary frame sent right after
+    it, or base64 in message[data_key] from clients that still inline it.
+    """
+    return message.get(data_key) or await websocket.receive_bytes()
+
+
+async def transcribe_upload(
+    audio: Union[bytes, str], audio_format: str, language: str = "en"
+) -> Dict[str, Any]:
+    """Transcribe raw audio bytes, or a base64 string from older clients."""
+    if isinstance(audio, str):
+        return await transcribe_base64(audio, audio_format, language)
+    return await transcribe_audio(audio, audio_format, language)
+
+
+class ChatConnection:
+    """
+    Send side of a chat WebSocket with replies spoken in the background.
+
+    TTS runs on its own task so the receive loop keeps reading while audio
+    streams out; streamed LLM replies are generated on another, which
+    interrupt() leaves alone so no turn is ever half-recorded. Sends go
+    through one lock so audio frames and handler messages never interleave
+    mid-write. JSON goes through orjson, which also handles datetimes
+    natively. Stands in for the WebSocket in the send helpers below.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self._send_lock = asyncio.Lock()
+        self._speech: Optional[asyncio.Task] = None
+        self._generation: Optional[asyncio.Task] = None
+
+    async def send_json(self, payload: Dict[str, Any]):
+        # orjson, still as a text frame: binary frames carry audio
+        data = orjson.dumps(payload).decode("utf-8")
+        async with self._send_lock:
+            await self.websocket.send_text(data)
+
+    async def send_text(self, text: str):
+        async with self._send_lock:
+            await self.websocket.send_text(text)
+
+    async def send_bytes(self, data: bytes):
+        async with self._send_lock:
+            await self.websocket.send_bytes(data)
+
+    def speak(self, start: Callable[[], Awaitable[Any]]):
+        """Run start() in the background once the current utterance finishes."""
+        self._speech = asyncio.create_task(self._speak_after(self._speech, start))
+
+    def reply(
+        self,
+        text_chunks: AsyncIterable[str],
+        build_message: Callable[[str], Dict[str, Any]],
+    ):
+        """
+        Staircase pipeline: speak a streamed LLM reply while it is generated.
+
+        Audio for the first words goes out while the rest of the reply is
+        still being generated. The text message built by `build_message` is
+        sent as soon as the full reply is known. Generation waits for any
+        earlier reply to finish generating and is not cut off by interrupt(),
+        so the agent's history always gets the model turn and the client
+        always gets the text; barge-in only stops the audio.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def queued_text() -> AsyncIterator[str]:
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+
+        self._generation = asyncio.create_task(
+            self._generate_after(self._generation, text_chunks, build_message, queue)
+        )
+        self.speak(partial(
+            stream_audio_to_websocket, self, synthesize_text_stream(queued_text())
+        ))
+
+    def interrupt(self):
+        """Cut off the current utterance and any queued behind it (barge-in)."""
+        if self._speech is not None:
+            self._speech.cancel()
+            self._speech = None
+
+    def close(self):
+        """Cancel speech and generation still in flight (socket is closing)."""
+        self.interrupt()
+        if self._generation is not None:
+            self._generation.cancel()
+            self._generation = None
+
+    @staticmethod
+    async def _wait_for(previous: Optional[asyncio.Task]):
+        # Cancelling a queued task cancels everything queued ahead of it
+        if previous is not None:
+            try:
+                await asyncio.wait([previous])
+            except asyncio.CancelledError:
+                previous.cancel()
+                raise
+
+    @classmethod
+    async def _speak_after(cls, previous: Optional[asyncio.Task], start):
+        await cls._wait_for(previous)
+        try:
+            await start()
+        except Exception as e:
+            print(f"Background TTS error: {str(e)}")
+
+    async def _generate_after(
+        self,
+        previous: Optional[asyncio.Task],
+        text_chunks: AsyncIterable[str],
+        build_message: Callable[[str], Dict[str, Any]],
+        queue: asyncio.Queue,
+    ):
+        try:
+            await self._wait_for(previous)
+            parts: List[str] = []
+            try:
+                async for chunk in text_chunks:
+                    parts.append(chunk)
+                    queue.put_nowait(chunk)
+            finally:
+                queue.put_nowait(None)
+            await self.send_json(build_message("".join(parts).strip()))
+        except Exception as e:
+            print(f"Background reply error: {str(e)}")
+
+
 # ============== TTS Helper ==============
 
+# Read once at import (after load_dotenv) rather than on every utterance
+ELEVENLABS_ENABLED = bool(os.getenv("ELEVENLABS_API_KEY"))
+
 
 async def stream_tts_to_websocket(websocket: WebSocket, text: str):
     """
     Stream TTS audio chunks to the WebSocket client.
     Sends audio in chunks for real-time playback.
     """
-    import base64
-    import os
+    await stream_audio_to_websocket(websocket, synthesize_speech_streaming(text))
+
+
+# Binary audio frames: one flag byte, then the MP3 bytes
+AUDIO_CHUNK_FLAG = b"\x00"
+AUDIO_FINAL_FLAG = b"\x01"
+AUDIO_CANCEL_FLAG = b"\x02"  # discard audio received so far (barge-in)
+
 
+async def stream_audio_to_websocket(websocket: WebSocket, audio_chunks: AsyncIterator[bytes]):
+    """
+    Send synthesized audio to the client as binary WebSocket frames.
+
+    Each frame is a flag byte (0 = more audio follows, 1 = final) followed by
+    raw MP3 bytes, so there is no base64 or JSON step on either side. If the
+    stream is cancelled partway, a bare 2 tells the client to drop the partial
+    audio.
+    """
     # Skip TTS if no API key configured
-    if not os.getenv("ELEVENLABS_API_KEY"):
+    if not ELEVENLABS_ENABLED:
         print("Warning: ELEVENLABS_API_KEY not set, skipping TTS")
         return
 
     try:
-        chunk_buffer = b""
+        # Reused across flushes instead of reallocating on every +=
+        chunk_buffer = bytearray()
         chunk_count = 0
 
-        async for audio_chunk in synthesize_speech_streaming(text):
-            chunk_buffer += audio_chunk
-            # Send chunks of ~8KB for smooth streaming
-            if len(chunk_buffer) >= 8192:
-                await websocket.send_json(
-                    {
-                        "type": "audio_chunk",
-                        "audio": base64.b64encode(chunk_buffer).decode("utf-8"),
-                        "is_final": False,
-                    }
-                )
-                chunk_buffer = b""
+        async for audio_chunk in audio_chunks:
+            chunk_buffer.extend(audio_chunk)
+            # The first chunk goes out as soon as it arrives to cut time to
+            # first audio; after that, coalesce ~8KB to amortize frame overhead
+            if chunk_count == 0 or len(chunk_buffer) >= 8192:
+                await websocket.send_bytes(AUDIO_CHUNK_FLAG + chunk_buffer)
+                del chunk_buffer[:]
                 chunk_count += 1
 
-        # Send any remaining audio as final chunk
-        if chunk_buffer:
-            await websocket.send_json(
-                {
-                    "type": "audio_chunk",
-                    "audio": base64.b64encode(chunk_buffer).decode("utf-8"),
-                    "is_final": True,
-                }
-            )
-        elif chunk_count > 0:
-            # If we sent chunks but buffer is empty, send empty final signal
-            await websocket.send_json(
-                {"type": "audio_chunk", "audio": "", "is_final": True}
-            )
-
+        # Send any remaining audio as final chunk; if we sent chunks but the
+        # buffer is empty, the bare flag is the final signal
+        if chunk_buffer or chunk_count > 0:
+            await websocket.send_bytes(AUDIO_FINAL_FLAG + chunk_buffer)
+
+    except asyncio.CancelledError:
+        if chunk_count > 0:
+            # Best effort: the socket may already be closed
+            try:
+                await websocket.send_bytes(AUDIO_CANCEL_FLAG)
+            except Exception:
+                pass
+        raise
     except Exception as e:
         print(f"TTS streaming error: {str(e)}")
         # Don't fail the whole request if TTS fails
@@ -136,6 +366,27 @@ async def websocket_camera(websocket: WebSocket):
 # ============== WebSocket for Voice Chat ==============
 
 
+def chat_response_message(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the "response" message for a process_message_resilient result.
+
+    An emergency flag is folded in as "clinical_alert" rather than sent as a
+    separate frame right behind the reply.
+    """
+    message = {
+        "type": "response",
+        "content": result["response"],
+        "provider": result.get("provider", "unknown"),
+        "fallback_used": result.get("fallback_used", False),
+    }
+    if result.get("should_alert_clinician"):
+        message["clinical_alert"] = {
+            "reason": "emergency_detected",
+            "intent": result.get("intent"),
+        }
+    return message
+
+
 @app.websocket("/ws/chat/{patient_id}")
 async def websocket_chat(websocket: WebSocket, patient_id: str):
     """
@@ -143,29 +394,33 @@ async def websocket_chat(websocket: WebSocket, patient_id: str):
 
     Messages from client:
     - {"type": "text", "content": "message text"}
-    - {"type": "audio", "data": "base64_audio", "format": "webm"}
+    - {"type": "audio", "format": "wav"} followed by a binary frame of audio
+      bytes (or legacy: the base64 audio inline as "data")
     - {"type": "get_greeting"}
     - {"type": "vital_result", "heart_rate": 72, "hrv": 45, "is_normal": true}
     - {"type": "end_session"}
 
     Messages to client:
     - {"type": "greeting", "content": "Hello!"}
-    - {"type": "response", "content": "AI response", "context": "extracted context"}
+    - {"type": "response", "content": "AI response", "provider": "gemini", "fallback_used": false}
+      (plus "clinical_alert": {"reason", "intent"} when an emergency is detected)
     - {"type": "transcription", "text": "transcribed text"}
     - {"type": "vital_response", "content": "Your vitals look great!"}
-    - {"type": "audio_chunk", "audio": "base64_audio_chunk", "is_final": false}
+    - binary frame: 1 flag byte (0 = more, 1 = final, 2 = cancelled) + MP3 audio bytes
     - {"type": "session_summary", "data": {...}}
     - {"type": "error", "message": "error description"}
     """
     await websocket.accept()
+    conn = ChatConnection(websocket)
 
     # Create chat agent for this session
     try:
-        chat_agent = create_pulse_chat_agent(patient_id)
-        session_id = f"{patient_id}_{datetime.utcnow().timestamp()}"
+        # Agent construction reads the patient from MongoDB (sync PyMongo)
+        chat_agent = await asyncio.to_thread(create_pulse_chat_agent, patient_id)
+        session_id = next(_session_ids)
         active_chat_sessions[session_id] = chat_agent
     except Exception as e:
-        await websocket.send_json(
+        await conn.send_json(
             {"type": "error", "message": f"Failed to initialize chat agent: {str(e)}"}
         )
         await websocket.close()
@@ -175,80 +430,53 @@ async def websocket_chat(websocket: WebSocket, patient_id: str):
         while True:
             # Receive message
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             msg_type = message.get("type")
 
             if msg_type == "get_greeting":
-                # Send initial greeting
-                greeting = chat_agent.get_greeting()
-                await websocket.send_json({"type": "greeting", "content": greeting})
-                # Stream TTS audio for greeting
-                await stream_tts_to_websocket(websocket, greeting)
+                # Send initial greeting, speaking each sentence as it is generated
+                conn.reply(
+                    chat_agent.stream_greeting(),
+                    lambda text: {"type": "greeting", "content": text},
+                )
 
             elif msg_type == "text":
                 # Process text message with resilient pipeline
                 content = message.get("content", "")
                 if content:
+                    # Barge-in: a new user turn cuts off the reply being spoken
+                    conn.interrupt()
                     # Use the async resilient method
                     result = await chat_agent.process_message_resilient(content)
-                    await websocket.send_json(
-                        {
-                            "type": "response",
-                            "content": result["response"],
-                            "context": result.get("context_extracted", ""),
-                            "provider": result.get("provider", "unknown"),
-                            "fallback_used": result.get("fallback_used", False),
-                        }
-                    )
+                    # Any clinician alert rides in the same frame as the reply
+                    await conn.send_json(chat_response_message(result))
                     # Stream TTS audio for response
-                    await stream_tts_to_websocket(websocket, result["response"])
-                    
-                    # Check if we need to alert clinician (emergency detected)
-                    if result.get("should_alert_clinician"):
-                        await websocket.send_json({
-                            "type": "clinical_alert",
-                            "reason": "emergency_detected",
-                            "intent": result.get("intent")
-                        })
+                    conn.speak(partial(stream_tts_to_websocket, conn, result["response"]))
 
             elif msg_type == "audio":
                 # Transcribe audio and then process with resilient pipeline
-                audio_data = message.get("data", "")
+                audio_data = await receive_audio(websocket, message, "data")
                 audio_format = message.get("format", "webm")
 
                 if audio_data:
+                    conn.interrupt()
                     # Transcribe using Groq
-                    transcription = await transcribe_base64(audio_data, audio_format)
+                    transcription = await transcribe_upload(audio_data, audio_format)
 
                     if transcription["success"] and transcription["text"]:
                         # Send transcription first
-                        await websocket.send_json(
+                        await conn.send_json(
                             {"type": "transcription", "text": transcription["text"]}
                         )
 
                         # Then process with resilient chat agent
                         result = await chat_agent.process_message_resilient(transcription["text"])
-                        await websocket.send_json(
-                            {
-                                "type": "response",
-                                "content": result["response"],
-                                "context": result.get("context_extracted", ""),
-                                "provider": result.get("provider", "unknown"),
-                                "fallback_used": result.get("fallback_used", False),
-                            }
-                        )
+                        # Any clinician alert rides in the same frame as the reply
+                        await conn.send_json(chat_response_message(result))
                         # Stream TTS audio for response
-                        await stream_tts_to_websocket(websocket, result["response"])
-                        
-                        # Check if we need to alert clinician
-                        if result.get("should_alert_clinician"):
-                            await websocket.send_json({
-                                "type": "clinical_alert",
-                                "reason": "emergency_detected",
-                                "intent": result.get("intent")
-                            })
+                        conn.speak(partial(stream_tts_to_websocket, conn, result["response"]))
                     else:
-                        await websocket.send_json(
+                        await conn.send_json(
                             {
                                 "type": "error",
                                 "message": transcription.get(
@@ -266,24 +494,20 @@ async def websocket_chat(websocket: WebSocket, patient_id: str):
                 # Mark calibration complete
                 chat_agent.set_calibration_complete()
 
-                vital_response = chat_agent.get_vital_response(
-                    heart_rate, hrv, is_normal
-                )
-                await websocket.send_json(
-                    {"type": "vital_response", "content": vital_response}
+                conn.reply(
+                    chat_agent.stream_vital_response(heart_rate, hrv, is_normal),
+                    lambda text: {"type": "vital_response", "content": text},
                 )
-                # Stream TTS audio for vital response
-                await stream_tts_to_websocket(websocket, vital_response)
             
             elif msg_type == "get_icebreaker":
                 # Sensor Redundancy: Send an icebreaker question during calibration
                 # This masks the rPPG latency with meaningful subjective data collection
                 icebreaker = chat_agent.get_icebreaker()
-                await websocket.send_json({
+                await conn.send_json({
                     "type": "icebreaker",
                     "content": icebreaker
                 })
-                await stream_tts_to_websocket(websocket, icebreaker)
+                conn.speak(partial(stream_tts_to_websocket, conn, icebreaker))
             
             elif msg_type == "calibration_status":
                 # Sensor Redundancy: Handle rPPG calibration status updates
@@ -293,40 +517,41 @@ async def websocket_chat(websocket: WebSocket, patient_id: str):
                     # ROI detection failed - prompt user to improve conditions
                     failure_reason = message.get("reason", "roi_failed")
                     sensor_msg = SENSOR_MESSAGES.get(failure_reason, SENSOR_MESSAGES["roi_failed"])
-                    await websocket.send_json({
+                    await conn.send_json({
                         "type": "sensor_guidance",
                         "content": sensor_msg,
                         "can_retry": True
                     })
-                    await stream_tts_to_websocket(websocket, sensor_msg)
+                    conn.speak(partial(stream_tts_to_websocket, conn, sensor_msg))
                 
                 elif status == "voice_only":
                     # Camera completely failed - degrade to voice-only mode
                     voice_only_msg = SENSOR_MESSAGES["voice_only_mode"]
-                    await websocket.send_json({
+                    await conn.send_json({
                         "type": "mode_change",
                         "mode": "voice_only",
                         "content": voice_only_msg
                     })
-                    await stream_tts_to_websocket(websocket, voice_only_msg)
+                    conn.speak(partial(stream_tts_to_websocket, conn, voice_only_msg))
                 
                 elif status == "calibrating":
                     # Still calibrating - send icebreaker to fill time
                     icebreaker = chat_agent.get_icebreaker()
-                    await websocket.send_json({
+                    await conn.send_json({
                         "type": "icebreaker", 
                         "content": icebreaker
                     })
-                    await stream_tts_to_websocket(websocket, icebreaker)
+                    conn.speak(partial(stream_tts_to_websocket, conn, icebreaker))
 
             elif msg_type == "end_session":
                 # End the session and return summary
+                await chat_agent.wait_for_context()
                 summary = chat_agent.get_session_summary()
-                await websocket.send_json({"type": "session_summary", "data": summary})
+                await conn.send_json({"type": "session_summary", "data": summary})
                 break
 
             else:
-                await websocket.send_json(
+                await conn.send_json(
                     {"type": "error", "message": f"Unknown message type: {msg_type}"}
                 )
 
@@ -335,13 +560,13 @@ async def websocket_chat(websocket: WebSocket, patient_id: str):
     except Exception as e:
         print(f"Chat WebSocket error: {str(e)}")
         try:
-            await websocket.send_json({"type": "error", "message": str(e)})
+            await conn.send_json({"type": "error", "message": str(e)})
         except Exception:
             pass
     finally:
+        conn.close()
         # Cleanup session
-        if session_id in active_chat_sessions:
-            del active_chat_sessions[session_id]
+        active_chat_sessions.pop(session_id, None)
 
 
 # ============== WebSocket for Health Data Chat (Dashboard) ==============
@@ -356,7 +581,8 @@ async def websocket_health_chat(websocket: WebSocket, patient_id: str):
 
     Messages from client:
     - {"type": "text", "content": "message text"}
-    - {"type": "audio", "data": "base64_audio", "format": "webm"}
+    - {"type": "audio", "format": "wav"} followed by a binary frame of audio
+      bytes (or legacy: the base64 audio inline as "data")
     - {"type": "get_greeting"}
     - {"type": "end_session"}
 
@@ -364,19 +590,21 @@ async def websocket_health_chat(websocket: WebSocket, patient_id: str):
     - {"type": "greeting", "content": "Hello!"}
     - {"type": "response", "content": "AI response"}
     - {"type": "transcription", "text": "transcribed text"}
-    - {"type": "audio_chunk", "audio": "base64_audio_chunk", "is_final": false}
+    - binary frame: 1 flag byte (0 = more, 1 = final, 2 = cancelled) + MP3 audio bytes
     - {"type": "session_summary", "data": {...}}
     - {"type": "error", "message": "error description"}
     """
     await websocket.accept()
+    conn = ChatConnection(websocket)
 
     # Create health data chat agent for this session
     try:
-        chat_agent = create_health_data_chat_agent(patient_id)
-        session_id = f"health_{patient_id}_{datetime.utcnow().timestamp()}"
+        # Loads patient, vitals and stats from MongoDB (sync PyMongo)
+        chat_agent = await asyncio.to_thread(create_health_data_chat_agent, patient_id)
+        session_id = next(_session_ids)
         active_chat_sessions[session_id] = chat_agent
     except Exception as e:
-        await websocket.send_json(
+        await conn.send_json(
             {"type": "error", "message": f"Failed to initialize chat agent: {str(e)}"}
         )
         await websocket.close()
@@ -385,61 +613,65 @@ async def websocket_health_chat(websocket: WebSocket, patient_id: str):
     try:
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             msg_type = message.get("type")
 
             if msg_type == "get_greeting":
-                greeting = chat_agent.get_greeting()
-                await websocket.send_json({"type": "greeting", "content": greeting})
-                await stream_tts_to_websocket(websocket, greeting)
+                # Generating the greeting is a blocking Gemini call
+                greeting = await asyncio.to_thread(chat_agent.get_greeting)
+                await conn.send_json({"type": "greeting", "content": greeting})
+                conn.speak(partial(stream_tts_to_websocket, conn, greeting))
 
             elif msg_type == "text":
                 content = message.get("content", "")
                 if content:
+                    # Barge-in: a new user turn cuts off the reply being spoken
+                    conn.interrupt()
                     # Use the async resilient method
                     result = await chat_agent.process_message_resilient(content)
-                    await websocket.send_json({
+                    await conn.send_json({
                         "type": "response",
                         "content": result["response"],
                         "provider": result.get("provider", "unknown"),
                         "fallback_used": result.get("fallback_used", False),
                     })
-                    await stream_tts_to_websocket(websocket, result["response"])
+                    conn.speak(partial(stream_tts_to_websocket, conn, result["response"]))
 
             elif msg_type == "audio":
-                audio_data = message.get("data", "")
+                audio_data = await receive_audio(websocket, message, "data")
                 audio_format = message.get("format", "webm")
 
                 if audio_data:
-                    transcription = await transcribe_base64(audio_data, audio_format)
+                    conn.interrupt()
+                    transcription = await transcribe_upload(audio_data, audio_format)
 
                     if transcription["success"] and transcription["text"]:
-                        await websocket.send_json(
+                        await conn.send_json(
                             {"type": "transcription", "text": transcription["text"]}
                         )
 
                         # Use the async resilient method
                         result = await chat_agent.process_message_resilient(transcription["text"])
-                        await websocket.send_json({
+                        await conn.send_json({
                             "type": "response",
                             "content": result["response"],
                             "provider": result.get("provider", "unknown"),
                             "fallback_used": result.get("fallback_used", False),
                         })
-                        await stream_tts_to_websocket(websocket, result["response"])
+                        conn.speak(partial(stream_tts_to_websocket, conn, result["response"]))
                     else:
-                        await websocket.send_json({
+                        await conn.send_json({
                             "type": "error",
                             "message": transcription.get("error", "Transcription failed"),
                         })
 
             elif msg_type == "end_session":
                 summary = chat_agent.get_session_summary()
-                await websocket.send_json({"type": "session_summary", "data": summary})
+                await conn.send_json({"type": "session_summary", "data": summary})
                 break
 
             else:
-                await websocket.send_json(
+                await conn.send_json(
                     {"type": "error", "message": f"Unknown message type: {msg_type}"}
                 )
 
@@ -448,17 +680,79 @@ async def websocket_health_chat(websocket: WebSocket, patient_id: str):
     except Exception as e:
         print(f"Health chat WebSocket error: {str(e)}")
         try:
-            await websocket.send_json({"type": "error", "message": str(e)})
+            await conn.send_json({"type": "error", "message": str(e)})
         except Exception:
             pass
     finally:
-        if session_id in active_chat_sessions:
-            del active_chat_sessions[session_id]
+        conn.close()
+        active_chat_sessions.pop(session_id, None)
 
 
 # ============== WebSocket for Triage Continuation ==============
 
 
+# Only the first few user messages are summarized; bound the parse work
+MAX_CHECKIN_MESSAGES = 50
+
+
+class CheckInMessage(BaseModel):
+    role: str
+    content: str = ""
+
+
+class TriageInit(BaseModel):
+    vitals: Dict[str, Any] = {}
+    conversation_history: List[CheckInMessage] = []
+    is_normal: bool = True
+
+    @field_validator("conversation_history", mode="before")
+    @classmethod
+    def _bound_history(cls, value):
+        # Also accept the saved check-in context object ({"messages": [...]})
+        if isinstance(value, dict):
+            value = value.get("messages", [])
+        return value[:MAX_CHECKIN_MESSAGES] if isinstance(value, list) else value
+
+
+# Path A: Normal vitals - reinforcement and lifestyle coaching
+_NORMAL_TRIAGE_GREETING = (
+    "Your vitals from the check-in look great - heart rate at {hr} bpm "
+    "and HRV at {hrv} ms are well within healthy ranges. "
+    "This is wonderful to see! {context}"
+    "I'd love to hear more about what's been working well for you. "
+    "Have you made any changes to your routine recently, or is there anything "
+    "you'd like to discuss about maintaining your heart health?"
+)
+# Path B: Abnormal vitals - investigation and support
+_ABNORMAL_TRIAGE_GREETING = (
+    "I've reviewed your check-in results, and I noticed {concerns}. "
+    "{context}"
+    "This doesn't mean something is wrong, but I'd like to understand better. "
+    "How have you been feeling today? Have you noticed anything different - "
+    "maybe stress, sleep changes, or any unusual symptoms?"
+)
+
+
+def build_triage_greeting(hr: float, hrv: float, is_normal: bool, context_summary: str) -> str:
+    """Fill the triage greeting template for the check-in vitals."""
+    hrv_rounded = round(hrv)
+    context = f"{context_summary} " if context_summary else ""
+
+    if is_normal:
+        return _NORMAL_TRIAGE_GREETING.format(hr=hr, hrv=hrv_rounded, context=context)
+
+    concerns = []
+    if hr > 85:
+        concerns.append(f"your heart rate is a bit elevated at {hr} bpm")
+    if hr < 60:
+        concerns.append(f"your heart rate is lower than usual at {hr} bpm")
+    if hrv < 35:
+        concerns.append(f"your HRV at {hrv_rounded} ms suggests some stress on your system")
+
+    concern_text = " and ".join(concerns) if concerns else "some of your readings need attention"
+    return _ABNORMAL_TRIAGE_GREETING.format(concerns=concern_text, context=context)
+
+
 @app.websocket("/ws/triage")
 async def websocket_triage(websocket: WebSocket):
     """
@@ -468,20 +762,22 @@ async def websocket_triage(websocket: WebSocket):
     the health assessment conversation on the dashboard.
     
     Messages from client:
-    - {"type": "init", "vitals": {...}, "conversation_history": [...], "is_normal": bool}
+    - {"type": "init", "vitals": {...}, "conversation_history": [{"role", "content"}, ...], "is_normal": bool}
     - {"type": "text", "text": "message text"}
-    - {"type": "audio", "audio": "base64_audio"}
+    - {"type": "audio", "format": "wav"} followed by a binary frame of audio
+      bytes (or legacy: the base64 audio inline as "audio")
     - {"type": "end_session"}
     
     Messages to client:
     - {"type": "greeting", "text": "triage greeting"}
     - {"type": "response", "text": "AI response"}
     - {"type": "transcription", "text": "transcribed text"}
-    - {"type": "audio_chunk", "audio": "base64_audio_chunk", "is_final": false}
+    - binary frame: 1 flag byte (0 = more, 1 = final, 2 = cancelled) + MP3 audio bytes
     - {"type": "session_end"}
     - {"type": "error", "message": "error description"}
     """
     await websocket.accept()
+    conn = ChatConnection(websocket)
     
     chat_agent = None
     initialized = False
@@ -489,113 +785,87 @@ async def websocket_triage(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             msg_type = message.get("type")
             
             if msg_type == "init":
                 # Initialize triage with context from check-in
-                vitals = message.get("vitals", {})
-                conversation_history = message.get("conversation_history", [])
-                is_normal = message.get("is_normal", True)
+                init = TriageInit.model_validate(message)
                 
                 # Create chat agent with triage context
-                chat_agent = create_pulse_chat_agent("maria_001")
+                chat_agent = await asyncio.to_thread(create_pulse_chat_agent, "maria_001")
                 
-                # Build context from check-in conversation
-                context_summary = ""
-                if conversation_history:
-                    # Handle both array of message objects and array-like object with numeric keys
-                    messages_list = conversation_history if isinstance(conversation_history, list) else list(conversation_history.values()) if isinstance(conversation_history, dict) else []
-                    user_messages = []
-                    for m in messages_list:
-                        if isinstance(m, dict) and m.get("role") == "user":
-                            user_messages.append(m.get("content", ""))
-                        elif isinstance(m, str):
-                            user_messages.append(m)
-                    if user_messages:
-                        context_summary = f"During check-in, patient shared: {'; '.join(user_messages[:3])}"
+                # Build context from the first few things the patient said at check-in
+                user_messages = [m.content for m in init.conversation_history if m.role == "user"][:3]
+                context_summary = (
+                    "During check-in, patient shared: " + "; ".join(user_messages)
+                    if user_messages
+                    else ""
+                )
                 
                 # Generate appropriate triage greeting based on vitals
-                hr = vitals.get("heart_rate", 0)
-                hrv = vitals.get("hrv", 0)
-                
-                if is_normal:
-                    # Path A: Normal vitals - reinforcement and lifestyle coaching
-                    greeting = (
-                        f"Your vitals from the check-in look great - heart rate at {hr} bpm "
-                        f"and HRV at {round(hrv)} ms are well within healthy ranges. "
-                        f"This is wonderful to see! {context_summary + ' ' if context_summary else ''}"
-                        f"I'd love to hear more about what's been working well for you. "
-                        f"Have you made any changes to your routine recently, or is there anything "
-                        f"you'd like to discuss about maintaining your heart health?"
-                    )
-                else:
-                    # Path B: Abnormal vitals - investigation and support
-                    concerns = []
-                    if hr > 85:
-                        concerns.append(f"your heart rate is a bit elevated at {hr} bpm")
-                    if hr < 60:
-                        concerns.append(f"your heart rate is lower than usual at {hr} bpm")
-                    if hrv < 35:
-                        concerns.append(f"your HRV at {round(hrv)} ms suggests some stress on your system")
-                    
-                    concern_text = " and ".join(concerns) if concerns else "some of your readings need attention"
-                    
-                    greeting = (
-                        f"I've reviewed your check-in results, and I noticed {concern_text}. "
-                        f"{context_summary + ' ' if context_summary else ''}"
-                        f"This doesn't mean something is wrong, but I'd like to understand better. "
-                        f"How have you been feeling today? Have you noticed anything different - "
-                        f"maybe stress, sleep changes, or any unusual symptoms?"
-                    )
+                greeting = build_triage_greeting(
+                    init.vitals.get("heart_rate", 0),
+                    init.vitals.get("hrv", 0),
+                    init.is_normal,
+                    context_summary,
+                )
                 
                 initialized = True
-                await websocket.send_json({"type": "greeting", "text": greeting})
-                await stream_tts_to_websocket(websocket, greeting)
+                await conn.send_json({"type": "greeting", "text": greeting})
+                conn.speak(partial(stream_tts_to_websocket, conn, greeting))
                 
             elif msg_type == "text" and initialized and chat_agent:
                 # Process text message
                 text = message.get("text", "")
                 if text:
-                    result = chat_agent.process_message(text)
-                    response = result.get("response", "I understand. Tell me more.")
-                    await websocket.send_json({"type": "response", "text": response})
-                    await stream_tts_to_websocket(websocket, response)
+                    # Barge-in: a new user turn cuts off the reply being spoken
+                    conn.interrupt()
+                    conn.reply(
+                        chat_agent.stream_message(text),
+                        lambda reply: {"type": "response", "text": reply or "I understand. Tell me more."},
+                    )
                     
             elif msg_type == "audio" and initialized and chat_agent:
                 # Process audio message
-                audio_data = message.get("audio", "")
+                audio_data = await receive_audio(websocket, message, "audio")
+                audio_format = message.get("format", "webm")
                 if audio_data:
-                    # Transcribe
-                    transcript = await transcribe_base64(audio_data)
+                    conn.interrupt()
+                    # Transcribe, overlapping STT with Gemini prefilling the history
+                    chat_agent.start_prefill()
+                    transcription = await transcribe_upload(audio_data, audio_format)
+                    transcript = transcription["text"] if transcription["success"] else ""
                     if transcript:
-                        await websocket.send_json({"type": "transcription", "text": transcript})
+                        await conn.send_json({"type": "transcription", "text": transcript})
                         # Process transcribed text
-                        result = chat_agent.process_message(transcript)
-                        response = result.get("response", "I understand. Tell me more.")
-                        await websocket.send_json({"type": "response", "text": response})
-                        await stream_tts_to_websocket(websocket, response)
+                        conn.reply(
+                            chat_agent.stream_message(transcript),
+                            lambda reply: {"type": "response", "text": reply or "I understand. Tell me more."},
+                        )
                     else:
-                        await websocket.send_json({"type": "error", "message": "Could not transcribe audio"})
+                        await conn.send_json({"type": "error", "message": "Could not transcribe audio"})
                         
             elif msg_type == "end_session":
-                await websocket.send_json({"type": "session_end"})
+                await conn.send_json({"type": "session_end"})
                 break
                 
             else:
                 if not initialized:
-                    await websocket.send_json({"type": "error", "message": "Session not initialized. Send init message first."})
+                    await conn.send_json({"type": "error", "message": "Session not initialized. Send init message first."})
                 else:
-                    await websocket.send_json({"type": "error", "message": f"Unknown message type: {msg_type}"})
+                    await conn.send_json({"type": "error", "message": f"Unknown message type: {msg_type}"})
                     
     except WebSocketDisconnect:
         print("Triage WebSocket disconnected")
     except Exception as e:
         print(f"Triage WebSocket error: {str(e)}")
         try:
-            await websocket.send_json({"type": "error", "message": str(e)})
+            await conn.send_json({"type": "error", "message": str(e)})
         except Exception:
             pass
+    finally:
+        conn.close()
 
 
 # ============== REST Endpoints for Chat ==============
@@ -607,12 +877,6 @@ class ChatMessageRequest(BaseModel):
     session_id: Optional[str] = None
 
 
-class AudioTranscribeRequest(BaseModel):
-    audio_base64: str
-    format: str = "webm"
-    language: str = "en"
-
-
 @app.post("/chat/message")
 async def chat_message(request: ChatMessageRequest):
     """
@@ -620,13 +884,13 @@ async def chat_message(request: ChatMessageRequest):
     Note: For real-time conversation, prefer the WebSocket endpoint.
     """
     try:
-        chat_agent = create_pulse_chat_agent(request.patient_id)
+        chat_agent = await asyncio.to_thread(create_pulse_chat_agent, request.patient_id)
 
-        # If no greeting has been sent, get one first
-        greeting = chat_agent.get_greeting()
+        # If no greeting has been sent, get one first (both are blocking LLM calls)
+        greeting = await asyncio.to_thread(chat_agent.get_greeting)
 
         # Process the message
-        result = chat_agent.process_message(request.message)
+        result = await asyncio.to_thread(chat_agent.process_message, request.message)
 
         return {
             "success": True,
@@ -639,14 +903,38 @@ async def chat_message(request: ChatMessageRequest):
 
 
 @app.post("/chat/transcribe")
-async def transcribe_audio_endpoint(request: AudioTranscribeRequest):
+async def transcribe_audio_endpoint(request: Request):
     """
     Transcribe audio to text using Groq Whisper.
+
+    Preferred body is multipart/form-data with the raw audio as "file" plus
+    optional "format" and "language" fields. JSON
+    {"audio_base64": str, "format": "webm", "language": "en"} is still
+    accepted; it's parsed with orjson rather than a Pydantic model so the
+    multi-MB base64 string isn't validated and copied again.
     """
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=422, detail="file (audio upload) is required")
+        audio = await upload.read()
+        body = form
+    else:
+        try:
+            body = orjson.loads(await request.body())
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=422, detail="Body must be JSON or multipart")
+        if not isinstance(body, dict) or not isinstance(body.get("audio_base64"), str):
+            raise HTTPException(status_code=422, detail="audio_base64 (string) is required")
+        audio = body["audio_base64"]
+    audio_format = body.get("format", "webm")
+    language = body.get("language", "en")
+    if not isinstance(audio_format, str) or not isinstance(language, str):
+        raise HTTPException(status_code=422, detail="format and language must be strings")
+
     try:
-        result = await transcribe_base64(
-            request.audio_base64, request.format, request.language
-        )
+        result = await transcribe_upload(audio, audio_format, language)
 
         if result["success"]:
             return {
@@ -731,7 +1019,7 @@ def health_check():
 def create_patient(patient: PatientCreate):
     """Create a new patient"""
     # Check if patient already exists
-    if patients.find_one({"_id": patient.patient_id}):
+    if patients.find_one({"_id": patient.patient_id}, {"_id": 1}):
         raise HTTPException(status_code=400, detail="Patient ID already exists")
 
     patient_doc = {
@@ -743,7 +1031,7 @@ def create_patient(patient: PatientCreate):
             "heart_rate": patient.baseline_heart_rate,
             "hrv": patient.baseline_hrv,
         },
-        "created_at": datetime.utcnow(),
+        "created_at": datetime.now(timezone.utc),
     }
 
     patients.insert_one(patient_doc)
@@ -753,10 +1041,17 @@ def create_patient(patient: PatientCreate):
 @app.get("/patients")
 def list_patients():
     """List all patients"""
-    all_patients = list(patients.find())
-    # Convert _id to patient_id for cleaner response
-    for p in all_patients:
-        p["patient_id"] = p.pop("_id")
+    # Project only the profile fields and rename _id to patient_id server-side
+    all_patients = list(patients.aggregate([
+        {"$project": {
+            "_id": 0,
+            "patient_id": "$_id",
+            "name": 1,
+            "age": 1,
+            "conditions": 1,
+            "baseline": 1,
+        }}
+    ]))
     return {"patients": all_patients, "count": len(all_patients)}
 
 
@@ -774,8 +1069,7 @@ def get_patient_by_id(patient_id: str):
 @app.put("/patients/{patient_id}")
 def update_patient(patient_id: str, update: PatientUpdate):
     """Update patient details"""
-    patient = get_patient(patient_id)
-    if not patient:
+    if not patient_exists(patient_id):
         raise HTTPException(status_code=404, detail="Patient not found")
 
     update_doc = {}
@@ -791,8 +1085,9 @@ def update_patient(patient_id: str, update: PatientUpdate):
         update_doc["baseline.hrv"] = update.baseline_hrv
 
     if update_doc:
-        update_doc["updated_at"] = datetime.utcnow()
+        update_doc["updated_at"] = datetime.now(timezone.utc)
         patients.update_one({"_id": patient_id}, {"$set": update_doc})
+        forget_patient_profile(patient_id)
 
     return {"message": "Patient updated", "patient_id": patient_id}
 
@@ -800,12 +1095,12 @@ def update_patient(patient_id: str, update: PatientUpdate):
 @app.delete("/patients/{patient_id}")
 def delete_patient(patient_id: str):
     """Delete a patient and their vitals"""
-    patient = get_patient(patient_id)
-    if not patient:
+    # The delete result doubles as the existence check
+    if patients.delete_one({"_id": patient_id}).deleted_count == 0:
         raise HTTPException(status_code=404, detail="Patient not found")
+    forget_patient_cache(patient_id)
 
-    # Delete patient and their vitals
-    patients.delete_one({"_id": patient_id})
+    # Served by the {patient_id, timestamp} index
     vitals_deleted = vitals.delete_many({"patient_id": patient_id})
 
     return {
@@ -822,7 +1117,7 @@ def delete_patient(patient_id: str):
 def create_vital(vital: VitalCreate):
     """Store new vitals measurement (from camera)"""
     # Verify patient exists
-    if not get_patient(vital.patient_id):
+    if not patient_exists(vital.patient_id):
         raise HTTPException(status_code=404, detail="Patient not found")
 
     vital_id = store_new_vital(
@@ -838,7 +1133,7 @@ def create_vital(vital: VitalCreate):
 @app.get("/vitals/{patient_id}")
 def get_vitals(patient_id: str, days: Optional[int] = None):
     """Get vitals for a patient. If days specified, returns recent; otherwise all."""
-    if not get_patient(patient_id):
+    if not patient_exists(patient_id):
         raise HTTPException(status_code=404, detail="Patient not found")
 
     if days:
@@ -856,7 +1151,7 @@ def get_vitals(patient_id: str, days: Optional[int] = None):
 @app.get("/vitals/{patient_id}/latest")
 def get_latest_vital(patient_id: str):
     """Get the most recent vital reading"""
-    if not get_patient(patient_id):
+    if not patient_exists(patient_id):
         raise HTTPException(status_code=404, detail="Patient not found")
 
     latest = vitals.find_one({"patient_id": patient_id}, sort=[("timestamp", -1)])
@@ -872,7 +1167,7 @@ def get_latest_vital(patient_id: str):
 
 
 @app.post("/vitals/analyze")
-def analyze_vitals(request: VitalAnalyzeRequest):
+async def analyze_vitals(request: VitalAnalyzeRequest) -> ORJSONResponse:
     """
     Store vitals and run AI agent analysis for decompensation detection.
 
@@ -883,19 +1178,24 @@ def analyze_vitals(request: VitalAnalyzeRequest):
        - Decompensation Agent: Calculates risk and clinical reasoning
        - Health Literacy Agent: Generates patient-friendly explanation
     3. Returns comprehensive analysis results
+
+    The blocking MongoDB and LLM work runs on the default executor, so a
+    multi-second analysis doesn't hold one of the sync-route threads.
     """
     # Verify patient exists
-    if not get_patient(request.patient_id):
+    if not await asyncio.to_thread(patient_exists, request.patient_id):
         raise HTTPException(status_code=404, detail="Patient not found")
 
     # Store the vital first
-    vital_id = store_new_vital(
+    vital_id = await asyncio.to_thread(
+        store_new_vital,
         request.patient_id, request.heart_rate, request.hrv, request.quality_score
     )
 
     # Run AI agent analysis
     try:
-        analysis = run_agent_analysis(
+        analysis = await asyncio.to_thread(
+            run_agent_analysis,
             patient_id=request.patient_id,
             heart_rate=request.heart_rate,
             hrv=request.hrv,
@@ -903,7 +1203,7 @@ def analyze_vitals(request: VitalAnalyzeRequest):
         )
     except Exception as e:
         # Return partial response if AI analysis fails
-        return {
+        return ORJSONResponse({
             "vital_id": vital_id,
             "patient_id": request.patient_id,
             "analysis_error": str(e),
@@ -917,12 +1217,13 @@ def analyze_vitals(request: VitalAnalyzeRequest):
                 ],
             },
             "patient_explanation": "Your vitals have been recorded. Please continue your regular monitoring.",
+            "quality_assessment": None,
             "agent_steps": [],
             "alerts": [f"AI analysis failed: {str(e)}"],
-        }
+        })
 
-    # Return complete response
-    return {
+    # Returned directly so the large analysis dict skips jsonable_encoder
+    return ORJSONResponse({
         "vital_id": vital_id,
         "patient_id": request.patient_id,
         "current_vitals": analysis.get("current_vitals"),
@@ -930,10 +1231,11 @@ def analyze_vitals(request: VitalAnalyzeRequest):
         "deviations": analysis.get("deviations"),
         "risk_assessment": analysis.get("risk_assessment"),
         "patient_explanation": analysis.get("patient_explanation"),
+        "quality_assessment": analysis.get("quality_assessment"),
         "agent_steps": analysis.get("agent_steps", []),
         "alerts": analysis.get("alerts", []),
         "errors": analysis.get("errors", []),
-    }
+    })
 
 
 # ============== Analytics Endpoints ==============
@@ -942,7 +1244,7 @@ def analyze_vitals(request: VitalAnalyzeRequest):
 @app.get("/analytics/{patient_id}/stats")
 def get_patient_stats(patient_id: str, days: int = 7):
     """Get statistical summary of recent vitals"""
-    if not get_patient(patient_id):
+    if not patient_exists(patient_id):
         raise HTTPException(status_code=404, detail="Patient not found")
 
     stats = calculate_stats(patient_id, days)
@@ -955,22 +1257,19 @@ def get_patient_stats(patient_id: str, days: int = 7):
 @app.get("/analytics/{patient_id}/trends")
 def get_trends(patient_id: str, days: int = 7):
     """Analyze trends in vitals - detecting improvement or decline"""
-    if not get_patient(patient_id):
+    if not patient_exists(patient_id):
         raise HTTPException(status_code=404, detail="Patient not found")
 
-    recent = get_recent_vitals(patient_id, days)
-    if len(recent) < 3:
+    # Linear regression slopes, computed by MongoDB in one aggregation
+    trend = calculate_trend_stats(patient_id, days)
+    if not trend or trend["count"] < 3:
         raise HTTPException(
             status_code=400,
             detail="Not enough data for trend analysis (need at least 3 readings)",
         )
 
-    # Calculate trend using simple linear regression slope
-    hr_values = [v["heart_rate"] for v in recent]
-    hrv_values = [v["hrv"] for v in recent]
-
-    hr_trend = calculate_trend(hr_values)
-    hrv_trend = calculate_trend(hrv_values)
+    hr_trend = trend["hr_slope"]
+    hrv_trend = trend["hrv_slope"]
 
     # Determine status
     status = "stable"
@@ -994,7 +1293,7 @@ def get_trends(patient_id: str, days: int = 7):
     return {
         "patient_id": patient_id,
         "days": days,
-        "readings_analyzed": len(recent),
+        "readings_analyzed": trend["count"],
         "trends": {
             "heart_rate": {
                 "direction": "rising"
@@ -1018,34 +1317,127 @@ def get_trends(patient_id: str, days: int = 7):
     }
 
 
+# Short TTL also covers readings stored by other processes
+_alert_cache = TTLCache(maxsize=1024, ttl=2.0)
+
+
 @app.get("/analytics/{patient_id}/alerts")
-def get_alerts(patient_id: str):
-    """Check current alerts based on latest vitals and baseline"""
-    patient = get_patient(patient_id)
-    if not patient:
+def get_alerts(patient_id: str, include_messages: bool = True):
+    """
+    Check current alerts based on latest vitals and baseline. Clients that
+    only read type/severity can pass include_messages=false.
+    """
+    if not patient_exists(patient_id):
         raise HTTPException(status_code=404, detail="Patient not found")
 
-    latest = vitals.find_one({"patient_id": patient_id}, sort=[("timestamp", -1)])
+    # Dashboards poll this; a new reading changes the key, so it's never stale
+    key = (patient_id, vitals_version(patient_id), include_messages)
+    cached = _alert_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # New patients are polled before their first reading; skip the query
+    latest = None
+    if not known_without_vitals(patient_id):
+        latest = vitals.find_one(
+            {"patient_id": patient_id},
+            {"timestamp": 1, "heart_rate": 1, "hrv": 1, "_id": 0},
+            sort=[("timestamp", -1)],
+        )
+        if not latest:
+            mark_without_vitals(patient_id)
 
     if not latest:
-        return {"patient_id": patient_id, "alerts": [], "status": "no_data"}
+        result = {"patient_id": patient_id, "alerts": [], "status": "no_data"}
+    else:
+        alerts = check_vital_alerts(
+            patient_id, latest["heart_rate"], latest["hrv"], include_messages
+        )
+        result = {
+            "patient_id": patient_id,
+            "timestamp": latest["timestamp"],
+            "current_hr": latest["heart_rate"],
+            "current_hrv": latest["hrv"],
+            "alerts": alerts,
+            "alert_count": len(alerts),
+        }
 
-    alerts = check_vital_alerts(patient_id, latest["heart_rate"], latest["hrv"])
+    _alert_cache.put(key, result)
+    return result
 
-    return {
-        "patient_id": patient_id,
-        "timestamp": latest["timestamp"],
-        "current_hr": latest["heart_rate"],
-        "current_hrv": latest["hrv"],
-        "alerts": alerts,
-        "alert_count": len(alerts),
-    }
+
+@app.get("/analytics/alerts")
+def get_all_current_alerts(include_messages: bool = True):
+    """
+    Current alerts for every patient, like /analytics/{patient_id}/alerts
+    but from one aggregation instead of a request per patient
+    """
+    latest = list(
+        vitals.aggregate(
+            [
+                # Walks the (patient_id, timestamp) index, so $first is the
+                # latest reading of each patient
+                {"$sort": {"patient_id": 1, "timestamp": -1}},
+                {
+                    "$group": {
+                        "_id": "$patient_id",
+                        "timestamp": {"$first": "$timestamp"},
+                        "heart_rate": {"$first": "$heart_rate"},
+                        "hrv": {"$first": "$hrv"},
+                    }
+                },
+                {
+                    "$lookup": {
+                        "from": "patients",
+                        "localField": "_id",
+                        "foreignField": "_id",
+                        "pipeline": [{"$project": {"_id": 0, "baseline": 1}}],
+                        "as": "patient",
+                    }
+                },
+                # Skip vitals left behind by deleted patients
+                {"$match": {"patient": {"$ne": []}}},
+            ]
+        )
+    )
+
+    threshold_alerts = check_vital_alerts_batch(
+        [doc["heart_rate"] for doc in latest],
+        [doc["hrv"] for doc in latest],
+        include_messages,
+    )
+    results = []
+    for doc, alerts in zip(latest, threshold_alerts):
+        alerts = alerts + _baseline_alerts(
+            doc["patient"][0].get("baseline"),
+            doc["heart_rate"],
+            doc["hrv"],
+            include_messages,
+        )
+        results.append(
+            {
+                "patient_id": doc["_id"],
+                "timestamp": doc["timestamp"],
+                "current_hr": doc["heart_rate"],
+                "current_hrv": doc["hrv"],
+                "alerts": alerts,
+                "alert_count": len(alerts),
+            }
+        )
+
+    return {"patients": results, "count": len(results)}
+
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters for the in-process caches"""
+    return {**cache_stats(), "alerts": _alert_cache.stats()}
 
 
 @app.get("/analytics/{patient_id}/baseline-comparison")
 def compare_to_baseline(patient_id: str):
     """Compare current vitals to baseline"""
-    patient = get_patient(patient_id)
+    patient = get_patient_profile(patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
@@ -1083,74 +1475,108 @@ def compare_to_baseline(patient_id: str):
 # ============== Helper Functions ==============
 
 
-def calculate_trend(values: List[float]) -> float:
-    """Calculate linear regression slope (change per reading)"""
-    n = len(values)
-    if n < 2:
-        return 0.0
+# Absolute alert thresholds
+HR_ELEVATED_BPM = 100
+HR_CRITICAL_BPM = 120
+HR_LOW_BPM = 50
+HRV_LOW_MS = 30
+HRV_CRITICAL_MS = 20
+
+# One bit per threshold crossed. Paired bits (elevated/critical HR,
+# low/critical HRV) are both set past the stricter limit; only it is reported.
+_HR_ELEVATED = 1 << 0
+_HR_CRITICAL = 1 << 1
+_HR_LOW = 1 << 2
+_HRV_CRITICAL = 1 << 3
+_HRV_LOW = 1 << 4
+
+
+def _threshold_mask(heart_rate, hrv):
+    # Elementwise, so the same expression serves a single reading (int) and
+    # NumPy arrays (one vectorized compare per threshold, no branches)
+    return (
+        (heart_rate > HR_ELEVATED_BPM)
+        | (heart_rate > HR_CRITICAL_BPM) << 1
+        | (heart_rate < HR_LOW_BPM) << 2
+        | (hrv < HRV_CRITICAL_MS) << 3
+        | (hrv < HRV_LOW_MS) << 4
+    )
 
-    x_mean = (n - 1) / 2
-    y_mean = sum(values) / n
 
-    numerator = sum((i - x_mean) * (values[i] - y_mean) for i in range(n))
-    denominator = sum((i - x_mean) ** 2 for i in range(n))
+def threshold_alert_masks(heart_rate: np.ndarray, hrv: np.ndarray) -> np.ndarray:
+    """Bitmask (uint8) of the absolute thresholds each reading crosses"""
+    return _threshold_mask(np.asarray(heart_rate), np.asarray(hrv)).astype(np.uint8)
 
-    if denominator == 0:
-        return 0.0
 
-    return numerator / denominator
+# (bit, type, severity, message template, value: 0 = heart rate, 1 = HRV),
+# in the order alerts are reported
+_THRESHOLD_ALERTS = (
+    (_HR_CRITICAL, "high_hr", "critical", "Heart rate critically high: {} bpm", 0),
+    (_HR_ELEVATED, "high_hr", "warning", "Heart rate elevated: {} bpm", 0),
+    (_HR_LOW, "low_hr", "warning", "Heart rate low: {} bpm", 0),
+    (_HRV_CRITICAL, "low_hrv", "warning", "HRV critically low: {} ms", 1),
+    (_HRV_LOW, "low_hrv", "info", "HRV below optimal: {} ms", 1),
+)
+_HR_ABOVE_BASELINE = "Heart rate {:.0f}% above baseline"
+_HRV_BELOW_BASELINE = "HRV {:.0f}% below baseline"
 
 
-def check_vital_alerts(patient_id: str, heart_rate: float, hrv: float) -> List[dict]:
-    """Check vitals against thresholds and baseline"""
+def _threshold_alerts(
+    mask: int, heart_rate: float, hrv: float, include_messages: bool = True
+) -> List[dict]:
+    """Alert dicts for one reading's threshold mask"""
+    # Past the stricter limit of a pair, drop the milder alert
+    mask &= ~((mask & _HR_CRITICAL) >> 1 | (mask & _HRV_CRITICAL) << 1)
+    values = (heart_rate, hrv)
     alerts = []
+    for bit, alert_type, severity, template, value in _THRESHOLD_ALERTS:
+        if mask & bit:
+            alert = {"type": alert_type, "severity": severity}
+            if include_messages:
+                alert["message"] = template.format(values[value])
+            alerts.append(alert)
+    return alerts
 
-    # Absolute thresholds
-    if heart_rate > 100:
-        alerts.append(
-            {
-                "type": "high_hr",
-                "severity": "warning",
-                "message": f"Heart rate elevated: {heart_rate} bpm",
-            }
-        )
-    elif heart_rate > 120:
-        alerts.append(
-            {
-                "type": "high_hr",
-                "severity": "critical",
-                "message": f"Heart rate critically high: {heart_rate} bpm",
-            }
-        )
 
-    if heart_rate < 50:
-        alerts.append(
-            {
-                "type": "low_hr",
-                "severity": "warning",
-                "message": f"Heart rate low: {heart_rate} bpm",
-            }
+def check_vital_alerts_batch(
+    heart_rate: np.ndarray, hrv: np.ndarray, include_messages: bool = True
+) -> List[List[dict]]:
+    """
+    Absolute-threshold alerts for many readings at once (no baseline check).
+    Thresholds are compared array-wide; dicts are built only for readings
+    that crossed one.
+    """
+    masks = threshold_alert_masks(heart_rate, hrv)
+    # tolist() so messages format plain Python numbers, as for single readings
+    heart_rate = np.asarray(heart_rate).tolist()
+    hrv = np.asarray(hrv).tolist()
+    alerts = [[] for _ in heart_rate]
+    for i in np.flatnonzero(masks).tolist():
+        alerts[i] = _threshold_alerts(
+            int(masks[i]), heart_rate[i], hrv[i], include_messages
         )
+    return alerts
 
-    if hrv < 20:
-        alerts.append(
-            {
-                "type": "low_hrv",
-                "severity": "warning",
-                "message": f"HRV critically low: {hrv} ms",
-            }
-        )
-    elif hrv < 30:
-        alerts.append(
-            {
-                "type": "low_hrv",
-                "severity": "info",
-                "message": f"HRV below optimal: {hrv} ms",
-            }
-        )
 
-    # Baseline comparison
-    baseline = get_baseline(patient_id)
+def check_vital_alerts(
+    patient_id: str, heart_rate: float, hrv: float, include_messages: bool = True
+) -> List[dict]:
+    """Check vitals against thresholds and baseline; messages are optional"""
+    # A single reading isn't worth an array round-trip
+    mask = _threshold_mask(heart_rate, hrv)
+    alerts = _threshold_alerts(mask, heart_rate, hrv, include_messages) if mask else []
+
+    alerts.extend(
+        _baseline_alerts(get_baseline(patient_id), heart_rate, hrv, include_messages)
+    )
+    return alerts
+
+
+def _baseline_alerts(
+    baseline: Optional[dict], heart_rate: float, hrv: float, include_messages: bool = True
+) -> List[dict]:
+    """Deviation alerts for one reading against a patient's baseline"""
+    alerts = []
     if baseline and baseline.get("heart_rate") and baseline.get("hrv"):
         hr_change = (
             (heart_rate - baseline["heart_rate"]) / baseline["heart_rate"]
@@ -1158,22 +1584,16 @@ def check_vital_alerts(patient_id: str, heart_rate: float, hrv: float) -> List[d
         hrv_change = ((hrv - baseline["hrv"]) / baseline["hrv"]) * 100
 
         if hr_change > 20:
-            alerts.append(
-                {
-                    "type": "baseline_deviation",
-                    "severity": "warning",
-                    "message": f"Heart rate {hr_change:.0f}% above baseline",
-                }
-            )
+            alert = {"type": "baseline_deviation", "severity": "warning"}
+            if include_messages:
+                alert["message"] = _HR_ABOVE_BASELINE.format(hr_change)
+            alerts.append(alert)
 
         if hrv_change < -30:
-            alerts.append(
-                {
-                    "type": "baseline_deviation",
-                    "severity": "warning",
-                    "message": f"HRV {abs(hrv_change):.0f}% below baseline",
-                }
-            )
+            alert = {"type": "baseline_deviation", "severity": "warning"}
+            if include_messages:
+                alert["message"] = _HRV_BELOW_BASELINE.format(abs(hrv_change))
+            alerts.append(alert)
 
     return alerts
 
@@ -1195,12 +1615,6 @@ def get_assessment(hr_pct: float, hrv_pct: float) -> str:
 # ============== Health Check Endpoints ==============
 
 
-@app.get("/health")
-async def health_check():
-    """Basic health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
-
-
 @app.get("/health/llm")
 async def llm_health_check():
     """
@@ -1211,7 +1625,7 @@ async def llm_health_check():
     return {
         "status": "healthy",
         "providers": llm_client.get_health_status(),
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
 
@@ -1227,7 +1641,7 @@ async def detailed_health_check():
     db_healthy = False
     try:
         # Simple ping
-        patients.find_one()
+        await asyncio.to_thread(patients.find_one)
         db_healthy = True
     except Exception:
         pass
@@ -1252,5 +1666,18 @@ async def detailed_health_check():
             },
             "active_sessions": len(active_chat_sessions)
         },
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.now(timezone.utc).isoformat()
     }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "127.0.0.1"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop" if UVLOOP_AVAILABLE else "asyncio",
+        http="httptools",
+        ws="websockets",
+    )
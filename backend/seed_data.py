@@ -1,8 +1,9 @@
 # seed_data.py
-import random
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
-from database import patients, vitals
+import numpy as np
+
+from database import ensure_indexes, patients, vitals
 
 
 def clear_database():
@@ -22,7 +23,7 @@ def create_maria():
             "heart_rate": 68,
             "hrv": 45
         },
-        "created_at": datetime.utcnow()
+        "created_at": datetime.now(timezone.utc)
     }
     
     patients.insert_one(maria)
@@ -31,27 +32,34 @@ def create_maria():
 
 def generate_normal_vitals(patient_id, days=30, skip_last_days=0):
     """Generate stable vitals, optionally skipping recent days for declining period"""
-    base_date = datetime.utcnow() - timedelta(days=days)
+    base_date = datetime.now(timezone.utc) - timedelta(days=days)
+    n = days - skip_last_days
     
-    measurements = []
-    for day in range(days - skip_last_days):
-        timestamp = base_date + timedelta(days=day, hours=8)  # 8 AM each day
-        
-        vital = {
+    timestamps = [base_date + timedelta(days=day, hours=8) for day in range(n)]  # 8 AM each day
+    # Draw every reading at once; tolist() gives plain ints/floats for BSON
+    heart_rates = np.random.randint(64, 73, size=n).tolist()      # 68 ± 4
+    hrvs = np.random.randint(41, 50, size=n).tolist()             # 45 ± 4
+    quality_scores = np.random.uniform(0.85, 0.95, size=n).round(2).tolist()
+    
+    measurements = [
+        {
             "patient_id": patient_id,
             "timestamp": timestamp,
-            "heart_rate": random.randint(64, 72),      # 68 ± 4
-            "hrv": random.randint(41, 49),             # 45 ± 4
-            "quality_score": round(random.uniform(0.85, 0.95), 2)
+            "heart_rate": hr,
+            "hrv": hrv,
+            "quality_score": quality
         }
-        measurements.append(vital)
+        for timestamp, hr, hrv, quality in zip(timestamps, heart_rates, hrvs, quality_scores)
+    ]
     
-    vitals.insert_many(measurements)
-    print(f"✓ Added {days - skip_last_days} days of normal vitals")
+    # Unordered and unvalidated: generated docs are known-good, so the server
+    # can apply the batch without checking or serializing on each one
+    vitals.insert_many(measurements, ordered=False, bypass_document_validation=True)
+    print(f"✓ Added {n} days of normal vitals")
 
 def generate_declining_vitals(patient_id, days=5):
     """Generate 5 days of declining vitals (decompensation)"""
-    base_date = datetime.utcnow() - timedelta(days=days)
+    base_date = datetime.now(timezone.utc) - timedelta(days=days)
     
     measurements = []
     for day in range(days):
@@ -70,7 +78,7 @@ def generate_declining_vitals(patient_id, days=5):
         }
         measurements.append(vital)
     
-    vitals.insert_many(measurements)
+    vitals.insert_many(measurements, ordered=False, bypass_document_validation=True)
     print(f"✓ Added {days} days of declining vitals")
     
     # Print the progression so you can see it
@@ -85,6 +93,7 @@ def seed_everything():
     print("\n🌱 Seeding database...\n")
     
     clear_database()
+    ensure_indexes()
     patient_id = create_maria()
     
     # Generate 30 days total: 25 normal + 5 declining (no overlap)
@@ -95,9 +104,9 @@ def seed_everything():
     # Verify
     total_vitals = vitals.count_documents({"patient_id": patient_id})
     print(f"\n✅ Database ready! Total vitals: {total_vitals}")
-    print(f"📅 Date range: 30 days (25 normal + 5 declining)")
+    print("📅 Date range: 30 days (25 normal + 5 declining)")
     print(f"👤 Patient ID: {patient_id}")
 
 if __name__ == "__main__":
     seed_everything()
-    
\ No newline at end of file
+    
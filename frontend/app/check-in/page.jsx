@@ -11,6 +11,7 @@ export default function CheckInPage() {
   const router = useRouter();
   const wsRef = useRef(null);
   const hrHistoryRef = useRef([]);
+  const frameFormatRef = useRef('webp');
   const voiceChatRef = useRef(null);
 
   const [step, setStep] = useState(1);
@@ -58,9 +59,20 @@ export default function CheckInPage() {
     };
 
     ws.onmessage = (event) => {
+      // Frames arrive as binary WebP; vitals as JSON text
+      if (event.data instanceof Blob) {
+        const blob = new Blob([event.data], { type: `image/${frameFormatRef.current}` });
+        const url = URL.createObjectURL(blob);
+        setFrameData((prev) => {
+          if (prev) URL.revokeObjectURL(prev);
+          return url;
+        });
+        return;
+      }
+
       try {
         const data = JSON.parse(event.data);
-        setFrameData(data.frame);
+        if (data.frame_format) frameFormatRef.current = data.frame_format;
         setFaceDetected(data.face_detected);
         setCalibrationProgress(data.calibration_progress || 0);
         
@@ -101,7 +113,10 @@ export default function CheckInPage() {
       wsRef.current = null;
     }
     setConnected(false);
-    setFrameData(null);
+    setFrameData((prev) => {
+      if (prev) URL.revokeObjectURL(prev);
+      return null;
+    });
   }, []);
 
   // Countdown effect - captures vitals but waits for chat to complete
@@ -247,7 +262,7 @@ export default function CheckInPage() {
                 <div className="relative w-full aspect-video bg-black rounded-xl overflow-hidden mb-4">
                   {frameData ? (
                     <img
-                      src={`data:image/jpeg;base64,${frameData}`}
+                      src={frameData}
                       alt="Camera feed"
                       className="w-full h-full object-contain"
                     />
@@ -2,6 +2,7 @@
 
 import { Bot, Loader2, Mic, MicOff, Send, Volume2, VolumeX, X } from 'lucide-react';
 import { forwardRef, useCallback, useEffect, useImperativeHandle, useRef, useState } from 'react';
+import { encodeRecording, sendRecording } from '@/lib/wav';
 
 const TriageChat = forwardRef(function TriageChat({ 
   vitals, 
@@ -80,6 +81,7 @@ const TriageChat = forwardRef(function TriageChat({
     try {
       const wsUrl = process.env.NEXT_PUBLIC_WS_URL || 'ws://localhost:8000';
       const ws = new WebSocket(`${wsUrl}/ws/triage`);
+      ws.binaryType = 'arraybuffer';
       wsRef.current = ws;
       
       ws.onopen = () => {
@@ -97,6 +99,24 @@ const TriageChat = forwardRef(function TriageChat({
       };
       
       ws.onmessage = (event) => {
+        // TTS audio arrives as binary frames: flag byte (1 = final,
+        // 2 = cancelled) + MP3 bytes
+        if (event.data instanceof ArrayBuffer) {
+          if (isMuted) return;
+          const frame = new Uint8Array(event.data);
+          if (frame[0] === 2) {
+            audioChunksBufferRef.current = [];
+            return;
+          }
+          if (frame.length > 1) {
+            audioChunksBufferRef.current.push(new Blob([frame.subarray(1)], { type: 'audio/mpeg' }));
+          }
+          if (frame[0] === 1) {
+            playAccumulatedAudio();
+          }
+          return;
+        }
+
         try {
           const data = JSON.parse(event.data);
           
@@ -111,21 +131,6 @@ const TriageChat = forwardRef(function TriageChat({
               setIsProcessing(false);
               break;
               
-            case 'audio_chunk':
-              if (data.audio && !isMuted) {
-                const binaryString = atob(data.audio);
-                const bytes = new Uint8Array(binaryString.length);
-                for (let i = 0; i < binaryString.length; i++) {
-                  bytes[i] = binaryString.charCodeAt(i);
-                }
-                audioChunksBufferRef.current.push(new Blob([bytes], { type: 'audio/mpeg' }));
-                
-                if (data.is_final) {
-                  playAccumulatedAudio();
-                }
-              }
-              break;
-              
             case 'transcription':
               if (data.text) {
                 setMessages(prev => [...prev, {
@@ -219,19 +224,12 @@ const TriageChat = forwardRef(function TriageChat({
         const audioBlob = new Blob(audioChunksRef.current, { type: 'audio/webm' });
         stream.getTracks().forEach(track => track.stop());
         
-        // Convert to base64 and send
-        const reader = new FileReader();
-        reader.onloadend = () => {
-          const base64Audio = reader.result.split(',')[1];
-          if (wsRef.current?.readyState === WebSocket.OPEN) {
-            setIsProcessing(true);
-            wsRef.current.send(JSON.stringify({
-              type: 'audio',
-              audio: base64Audio
-            }));
-          }
-        };
-        reader.readAsDataURL(audioBlob);
+        // Convert to 16 kHz WAV and send the raw bytes
+        const recording = await encodeRecording(audioBlob);
+        if (wsRef.current?.readyState === WebSocket.OPEN) {
+          setIsProcessing(true);
+          sendRecording(wsRef.current, recording);
+        }
       };
       
       mediaRecorder.start();
@@ -2,6 +2,7 @@
 
 import { Loader2, MessageCircle, Mic, MicOff, Send, Volume2, VolumeX } from 'lucide-react';
 import { forwardRef, useCallback, useEffect, useImperativeHandle, useRef, useState } from 'react';
+import { encodeRecording, sendRecording } from '@/lib/wav';
 
 /**
  * VoiceChat Component
@@ -80,16 +81,6 @@ const VoiceChat = forwardRef(function VoiceChat({
     };
   }, []);
 
-  // Helper to decode base64 to Uint8Array
-  const base64ToBytes = useCallback((base64) => {
-    const binaryString = atob(base64);
-    const bytes = new Uint8Array(binaryString.length);
-    for (let i = 0; i < binaryString.length; i++) {
-      bytes[i] = binaryString.charCodeAt(i);
-    }
-    return bytes;
-  }, []);
-
   // Play accumulated audio chunks
   const playAccumulatedAudio = useCallback(() => {
     if (isMuted || audioChunksBufferRef.current.length === 0) {
@@ -132,14 +123,13 @@ const VoiceChat = forwardRef(function VoiceChat({
   }, [isMuted]);
 
   // Queue audio chunk - accumulates until final chunk received
-  const queueAudioChunk = useCallback((base64Audio, isFinal) => {
+  const queueAudioChunk = useCallback((bytes, isFinal) => {
     if (isMuted) {
       if (isFinal) audioChunksBufferRef.current = [];
       return;
     }
     
-    if (base64Audio) {
-      const bytes = base64ToBytes(base64Audio);
+    if (bytes.length) {
       audioChunksBufferRef.current.push(bytes);
     }
     
@@ -147,7 +137,7 @@ const VoiceChat = forwardRef(function VoiceChat({
     if (isFinal) {
       playAccumulatedAudio();
     }
-  }, [isMuted, base64ToBytes, playAccumulatedAudio]);
+  }, [isMuted, playAccumulatedAudio]);
 
   // Stop current audio playback
   const stopAudio = useCallback(() => {
@@ -198,7 +188,6 @@ const VoiceChat = forwardRef(function VoiceChat({
         setMessages(prev => [...prev, {
           role: 'assistant',
           content: data.content,
-          context: data.context,
           timestamp: new Date().toISOString()
         }]);
         break;
@@ -216,11 +205,6 @@ const VoiceChat = forwardRef(function VoiceChat({
         console.log('Session summary:', data.data);
         break;
       
-      case 'audio_chunk':
-        // Queue audio for playback - accumulate chunks until final
-        queueAudioChunk(data.audio, data.is_final);
-        break;
-      
       case 'tts_error':
         // TTS failed but don't show error to user - text is already displayed
         console.warn('TTS unavailable:', data.message);
@@ -239,7 +223,7 @@ const VoiceChat = forwardRef(function VoiceChat({
       default:
         console.log('Unknown message type:', data.type);
     }
-  }, [queueAudioChunk]);
+  }, []);
 
   // Track if connection ever succeeded (to distinguish failed connect vs disconnect)
   const hadConnectionRef = useRef(false);
@@ -269,6 +253,7 @@ const VoiceChat = forwardRef(function VoiceChat({
     console.log('Attempting to connect to:', wsUrl);
     
     const ws = new WebSocket(wsUrl);
+    ws.binaryType = 'arraybuffer';
     wsRef.current = ws;
 
     ws.onopen = () => {
@@ -290,6 +275,19 @@ const VoiceChat = forwardRef(function VoiceChat({
     };
 
     ws.onmessage = (event) => {
+      // TTS audio arrives as binary frames: flag byte (1 = final,
+      // 2 = cancelled) + MP3 bytes.
+      // Queue for playback - accumulate chunks until final
+      if (event.data instanceof ArrayBuffer) {
+        const frame = new Uint8Array(event.data);
+        if (frame[0] === 2) {
+          audioChunksBufferRef.current = [];
+          return;
+        }
+        queueAudioChunk(frame.subarray(1), frame[0] === 1);
+        return;
+      }
+
       try {
         const data = JSON.parse(event.data);
         handleMessage(data);
@@ -309,7 +307,7 @@ const VoiceChat = forwardRef(function VoiceChat({
       setConnected(false);
       setConnecting(false);
     };
-  }, [patientId, endpoint, handleMessage]);
+  }, [patientId, endpoint, handleMessage, queueAudioChunk]);
 
   // Initialize connection when component mounts
   useEffect(() => {
@@ -440,20 +438,12 @@ const VoiceChat = forwardRef(function VoiceChat({
         const audioBlob = new Blob(audioChunksRef.current, { type: 'audio/webm' });
         stream.getTracks().forEach(track => track.stop());
         
-        // Convert to base64 and send
-        const reader = new FileReader();
-        reader.onloadend = () => {
-          const base64Audio = reader.result.split(',')[1];
-          if (wsRef.current?.readyState === WebSocket.OPEN) {
-            setIsProcessing(true);
-            wsRef.current.send(JSON.stringify({
-              type: 'audio',
-              data: base64Audio,
-              format: 'webm'
-            }));
-          }
-        };
-        reader.readAsDataURL(audioBlob);
+        // Convert to 16 kHz WAV and send the raw bytes
+        const recording = await encodeRecording(audioBlob);
+        if (wsRef.current?.readyState === WebSocket.OPEN) {
+          setIsProcessing(true);
+          sendRecording(wsRef.current, recording);
+        }
       };
 
       mediaRecorder.start(100); // Collect data every 100ms
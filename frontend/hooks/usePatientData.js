@@ -21,7 +21,8 @@ export function usePatientData(patientId) {
       const [patientData, vitalsResponse, alertsData] = await Promise.all([
         getPatient(patientId),
         getVitals(patientId, 7),
-        getAlerts(patientId),
+        // The dashboard only reads alert severity
+        getAlerts(patientId, { includeMessages: false }),
       ]);
 
       const vitalsData = vitalsResponse?.vitals || [];
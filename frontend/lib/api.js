@@ -46,9 +46,11 @@ export async function analyzeVitals(data) {
     }
 }
 
-export async function getAlerts(patientId) {
+export async function getAlerts(patientId, { includeMessages = true } = {}) {
     try {
-        const response = await api.get(`/analytics/${patientId}/alerts`);
+        const response = await api.get(`/analytics/${patientId}/alerts`, {
+            params: { include_messages: includeMessages },
+        });
         return response.data;
     } catch (error) {
         console.error("Error fetching alerts:", error);
@@ -92,15 +94,19 @@ export async function sendChatMessage(patientId, message) {
  * For real-time transcription, use the WebSocket connection instead.
  */
 export async function transcribeAudio(
-    audioBase64,
+    audioBlob,
     format = "webm",
     language = "en",
 ) {
     try {
-        const response = await api.post("/chat/transcribe", {
-            audio_base64: audioBase64,
-            format: format,
-            language: language,
+        // Multipart upload sends the raw bytes rather than base64 in JSON
+        const form = new FormData();
+        form.append("file", audioBlob, `audio.${format}`);
+        form.append("format", format);
+        form.append("language", language);
+        const response = await api.post("/chat/transcribe", form, {
+            // Overrides the JSON default so axios doesn't serialize the form
+            headers: { "Content-Type": "multipart/form-data" },
         });
         return response.data;
     } catch (error) {
@@ -0,0 +1,97 @@
+// Whisper's native sample rate; anything else is resampled server-side
+const TARGET_SAMPLE_RATE = 16000;
+
+// Leading/trailing frames quieter than this RMS are trimmed as silence
+const SILENCE_RMS = 0.01;
+const FRAME_SIZE = 320; // 20ms at 16 kHz
+
+function trimSilence(samples) {
+  const isSpeech = (start) => {
+    let sum = 0;
+    const end = Math.min(start + FRAME_SIZE, samples.length);
+    for (let i = start; i < end; i++) sum += samples[i] * samples[i];
+    return Math.sqrt(sum / (end - start)) >= SILENCE_RMS;
+  };
+
+  let start = 0;
+  while (start < samples.length && !isSpeech(start)) start += FRAME_SIZE;
+  let end = samples.length;
+  while (end > start && !isSpeech(Math.max(start, end - FRAME_SIZE))) end -= FRAME_SIZE;
+
+  // Nothing above the threshold: keep the clip and let Whisper decide
+  if (start >= end) return samples;
+  return samples.subarray(start, end);
+}
+
+function encodeWav(samples, sampleRate) {
+  const buffer = new ArrayBuffer(44 + samples.length * 2);
+  const view = new DataView(buffer);
+  const writeString = (offset, str) => {
+    for (let i = 0; i < str.length; i++) view.setUint8(offset + i, str.charCodeAt(i));
+  };
+
+  writeString(0, 'RIFF');
+  view.setUint32(4, 36 + samples.length * 2, true);
+  writeString(8, 'WAVE');
+  writeString(12, 'fmt ');
+  view.setUint32(16, 16, true); // PCM chunk size
+  view.setUint16(20, 1, true); // PCM format
+  view.setUint16(22, 1, true); // mono
+  view.setUint32(24, sampleRate, true);
+  view.setUint32(28, sampleRate * 2, true); // byte rate
+  view.setUint16(32, 2, true); // block align
+  view.setUint16(34, 16, true); // bits per sample
+  writeString(36, 'data');
+  view.setUint32(40, samples.length * 2, true);
+
+  for (let i = 0; i < samples.length; i++) {
+    const s = Math.max(-1, Math.min(1, samples[i]));
+    view.setInt16(44 + i * 2, s < 0 ? s * 0x8000 : s * 0x7fff, true);
+  }
+
+  return new Blob([view], { type: 'audio/wav' });
+}
+
+/**
+ * Convert a MediaRecorder blob to 16 kHz mono 16-bit PCM WAV with leading and
+ * trailing silence trimmed, so Groq can skip the decode/resample step.
+ */
+export async function toWav16k(blob) {
+  const AudioCtx = window.AudioContext || window.webkitAudioContext;
+  const decodeCtx = new AudioCtx();
+  try {
+    const decoded = await decodeCtx.decodeAudioData(await blob.arrayBuffer());
+    const length = Math.ceil(decoded.duration * TARGET_SAMPLE_RATE);
+    const offline = new OfflineAudioContext(1, length, TARGET_SAMPLE_RATE);
+    const source = offline.createBufferSource();
+    source.buffer = decoded;
+    source.connect(offline.destination);
+    source.start();
+    const rendered = await offline.startRendering();
+    return encodeWav(trimSilence(rendered.getChannelData(0)), TARGET_SAMPLE_RATE);
+  } finally {
+    decodeCtx.close();
+  }
+}
+
+/**
+ * Prepare recorded audio for upload, preferring 16 kHz WAV and falling back
+ * to the original recording if the browser can't decode it.
+ */
+export async function encodeRecording(blob, fallbackFormat = 'webm') {
+  try {
+    return { blob: await toWav16k(blob), format: 'wav' };
+  } catch (error) {
+    console.error('WAV conversion failed, sending original audio:', error);
+    return { blob, format: fallbackFormat };
+  }
+}
+
+/**
+ * Send a recording over a chat WebSocket: an {"type": "audio"} header, then
+ * the raw bytes as one binary frame (no base64).
+ */
+export function sendRecording(ws, { blob, format }) {
+  ws.send(JSON.stringify({ type: 'audio', format }));
+  ws.send(blob);
+}
@@ -1,21 +1,83 @@
+import json
+import os
+import sys
+
 import cv2
 
+# Ask for the native backend directly instead of letting OpenCV try each one
+if sys.platform == "darwin":
+    BACKEND = cv2.CAP_AVFOUNDATION
+elif sys.platform.startswith("win"):
+    BACKEND = cv2.CAP_DSHOW
+else:
+    BACKEND = cv2.CAP_ANY
+
+SHOW = "--show" in sys.argv  # Display a frame from each working camera
+RESCAN = "--rescan" in sys.argv  # Ignore the cached camera and list them all
+CACHE_PATH = os.path.expanduser("~/.cache/nwhacks_cam.json")  # Last working index
+
+
+def probe(i):
+    """Print whether camera i works; True if it does"""
+    cap = cv2.VideoCapture(i, BACKEND)
+    if not cap.isOpened():
+        print(f"  Camera {i}: Not available")
+        return False
+
+    # grab() pulls a frame without decoding it; enough to prove it works
+    working = cap.grab()
+    if working:
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        print(f"  Camera {i}: Working! Resolution: {width}x{height}")
+        if SHOW:
+            ret, frame = cap.retrieve()
+            if ret:
+                cv2.imshow(f'Camera {i} - Press any key', frame)
+                cv2.waitKey(2000)  # Show for 2 seconds
+                cv2.destroyAllWindows()
+    cap.release()
+    return working
+
+
+def load_cached_index():
+    try:
+        with open(CACHE_PATH) as f:
+            return json.load(f)["idx"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_cached_index(i):
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with open(CACHE_PATH, "w") as f:
+            json.dump({"idx": i}, f)
+    except OSError:
+        pass  # Caching is only a shortcut for the next run
+
+
 print("Testing camera access...")
+
+# Retry the camera that worked last time before sweeping every index
+cached = None if RESCAN else load_cached_index()
+if cached is not None:
+    print(f"Last working camera ({CACHE_PATH}):")
+    if probe(cached):
+        print("\nRun with --rescan to list every camera.")
+        sys.exit(0)
+    print("  Cached camera failed; probing all cameras")
+
 print("Available cameras:")
 
 # Try to find working camera
-for i in range(5):
-    cap = cv2.VideoCapture(i)
-    if cap.isOpened():
-        ret, frame = cap.read()
-        if ret:
-            print(f"  Camera {i}: Working! Resolution: {frame.shape}")
-            cv2.imshow(f'Camera {i} - Press any key', frame)
-            cv2.waitKey(2000)  # Show for 2 seconds
-            cv2.destroyAllWindows()
-        cap.release()
-    else:
-        print(f"  Camera {i}: Not available")
+working = [i for i in range(5) if probe(i)]
+if working:
+    save_cached_index(working[0])
 
-print("\nIf you saw a window, your camera is working!")
-print("If not, check System Settings → Privacy & Security → Camera")
\ No newline at end of file
+if SHOW:
+    print("\nIf you saw a window, your camera is working!")
+    print("If not, check System Settings → Privacy & Security → Camera")
+else:
+    print("\nIf no camera is working, check System Settings → Privacy & Security → Camera")
+    print("Run with --show to display a frame from each working camera.")